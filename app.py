@@ -5,6 +5,7 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_mail import Mail
 import os
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -22,6 +23,8 @@ app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', 587))
 app.config['MAIL_USE_TLS'] = True
 app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
 app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
+app.config['ACCESS_SCHEDULER_ENABLED'] = os.getenv('ACCESS_SCHEDULER_ENABLED', 'True').lower() == 'true'
+app.config['SOCKETIO_MESSAGE_QUEUE'] = os.getenv('SOCKETIO_MESSAGE_QUEUE')
 
 # Initialize extensions
 db = SQLAlchemy(app)
@@ -37,18 +40,64 @@ limiter = Limiter(
 # Import routes after app initialization to avoid circular imports
 from controllers.hr_controller import hr_bp
 from controllers.access_manager import access_bp
+from services.access_scheduler import access_scheduler
+from services.audit_writer import audit_writer
+from services.notification_service import socketio, notification_digest
+from services.notification_dispatcher import notification_dispatcher
+from services.socket_broker import socketio_options
+from services.response_cache import table_versions
+from config.config import Config
 
 # Register blueprints
 app.register_blueprint(hr_bp)
 app.register_blueprint(access_bp)
 
+# Enforce access start/end dates in the background
+access_scheduler.init_app(app)
+
+# Batch DecisionLog inserts behind a write-ahead file
+audit_writer.init_app(app)
+
+# Share websocket broadcasts between worker processes through the message queue
+socketio.init_app(app, **socketio_options(
+    app.config['SOCKETIO_MESSAGE_QUEUE'],
+    connect_timeout=Config.NOTIFICATION_CHANNEL_TIMEOUTS['websocket']
+))
+
+# ETag versions come from the shared broker, or stay off across instances without one
+app.config['APP_INSTANCES'] = int(os.getenv('APP_INSTANCES', 1))
+table_versions.init_app(app)
+
+def shutdown_services(timeout=None):
+    """
+    Drain background work before the process exits
+
+    ``timeout`` is the budget for the whole shutdown, not for each step.
+    The scheduler, digest and dispatcher still produce audit rows, so they
+    stop first; they may use at most half of the budget, which keeps the
+    rest for the audit writer to flush its buffer to the database.
+    """
+    if timeout is None:
+        producers_deadline = deadline = None
+    else:
+        deadline = time.monotonic() + timeout
+        producers_deadline = deadline - timeout / 2
+
+    def remaining(until):
+        return None if until is None else max(until - time.monotonic(), 0)
+
+    access_scheduler.stop(remaining(producers_deadline))
+    notification_digest.stop(remaining(producers_deadline))
+    notification_dispatcher.shutdown(remaining(producers_deadline))
+    audit_writer.close(remaining(deadline))
+
 @app.route('/')
 def index():
     return render_template('dashboard/hr_dashboard.html')
 
 @app.route('/health')
 def health_check():
-    return jsonify({'status': 'healthy'})
+    return jsonify({'status': 'healthy', 'audit': audit_writer.metrics()})
 
 @app.errorhandler(404)
 def not_found_error(error):
@@ -63,9 +112,13 @@ if __name__ == '__main__':
     # Ensure all tables exist
     with app.app_context():
         db.create_all()
+
+    if app.config['ACCESS_SCHEDULER_ENABLED']:
+        access_scheduler.start()
     
     # Run app
-    app.run(
+    socketio.run(
+        app,
         host=os.getenv('FLASK_HOST', '0.0.0.0'),
         port=int(os.getenv('FLASK_PORT', 5000)),
         debug=os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark for notification rendering throughput.
+
+Compares the previous per-call f-string + json.dumps bodies with the
+compiled template registry, both uncached (every payload distinct) and
+cached (the same payload fanned out, as in bulk events). The HTML body is
+rendered lazily when an email is sent, so it is measured separately.
+
+    python -m benchmarks.bench_notification_render
+"""
+import json
+import timeit
+from datetime import datetime
+
+from services.notification_templates import templates
+
+DETAILS = {
+    'employee_email': 'jane.doe@example.com',
+    'access_type': 'building',
+    'status': 'revoked',
+    'reason': 'Contract ended',
+}
+ITERATIONS = 20000
+
+
+def render_fstring(details):
+    subject = f"HR Action Required: access_change"
+    body = f"""
+        Action Type: access_change
+        Details: {json.dumps(details, indent=2)}
+        Time: {datetime.now()}
+
+        Please review this action in the HR dashboard.
+        """
+    return subject, body
+
+
+def render_uncached(registry, i):
+    registry.clear_cache()
+    return registry.render('hr_review_required', action_type='access_change',
+                           details=DETAILS, time=i)
+
+
+def render_uncached_html(registry, i):
+    rendered = render_uncached(registry, i)
+    return rendered.subject, rendered.body, rendered.html
+
+
+def render_cached(registry):
+    return registry.render('hr_review_required', action_type='access_change',
+                           details=DETAILS, time='2026-01-01 09:00')
+
+
+def report(name, seconds):
+    print(f"{name:<24} {ITERATIONS / seconds:>12,.0f} renders/s")
+
+
+def main():
+    registry = templates
+
+    report('f-string + json.dumps', timeit.timeit(lambda: render_fstring(DETAILS), number=ITERATIONS))
+    counter = iter(range(ITERATIONS))
+    report('template (uncached)', timeit.timeit(lambda: render_uncached(registry, next(counter)),
+                                                number=ITERATIONS))
+    counter = iter(range(ITERATIONS))
+    report('template (uncached+html)', timeit.timeit(
+        lambda: render_uncached_html(registry, next(counter)), number=ITERATIONS))
+    report('template (cached)', timeit.timeit(lambda: render_cached(registry), number=ITERATIONS))
+
+
+if __name__ == '__main__':
+    main()
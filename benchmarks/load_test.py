@@ -0,0 +1,105 @@
+"""
+Load test for the multi-process deployment.
+
+Starts 1, 2, 4, ... single-worker instances (up to the CPU count) the way
+deploy/serve.py does, drives them with the same number of concurrent
+keep-alive clients, each pinned to one instance as the sticky proxy would
+pin it, and prints requests per second so throughput can be compared
+across instance counts.
+
+    python -m benchmarks.load_test --path /health --duration 10
+
+Set SOCKETIO_MESSAGE_QUEUE=memory:// to run without a broker.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import socket
+import subprocess
+import time
+
+from deploy.serve import start_instances, stop_instances
+
+
+def _client(port: int, path: str, deadline: float, results) -> None:
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    done = errors = 0
+    while time.time() < deadline:
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status < 500:
+                done += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    results.put((done, errors))
+
+
+def _wait_for_port(port: int, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(('127.0.0.1', port)) == 0:
+                return
+        time.sleep(0.2)
+    raise RuntimeError(f"Server did not start on port {port}")
+
+
+def run_load(ports: list, path: str, clients: int, duration: float):
+    results = multiprocessing.Queue()
+    deadline = time.time() + duration
+    procs = [multiprocessing.Process(target=_client,
+                                     args=(ports[i % len(ports)], path, deadline, results))
+             for i in range(clients)]
+    for proc in procs:
+        proc.start()
+    totals = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    done = sum(t[0] for t in totals)
+    errors = sum(t[1] for t in totals)
+    return done / duration, errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--path', default='/health')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=multiprocessing.cpu_count() * 4)
+    parser.add_argument('--port', type=int, default=5050)
+    parser.add_argument('--max-instances', type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+
+    counts = []
+    instances = 1
+    while instances <= args.max_instances:
+        counts.append(instances)
+        instances *= 2
+
+    os.environ['ACCESS_SCHEDULER_ENABLED'] = 'false'
+    print(f"{'instances':>9} {'req/s':>12} {'errors':>8} {'scaling':>8}")
+    baseline = None
+    for instances in counts:
+        ports = [args.port + index for index in range(instances)]
+        servers = start_instances(instances, args.port, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+        try:
+            for port in ports:
+                _wait_for_port(port)
+            rate, errors = run_load(ports, args.path, args.clients, args.duration)
+        finally:
+            # SIGTERM lets each instance drain through the worker_exit hook
+            stop_instances(servers)
+
+        baseline = baseline or rate
+        print(f"{instances:>9} {rate:>12,.0f} {errors:>8} {rate / baseline:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,32 @@ class Config:
     SQLALCHEMY_MAX_OVERFLOW = 20
     SQLALCHEMY_POOL_TIMEOUT = 30
 
+    # Audit log write-behind buffer
+    AUDIT_WAL_PATH = os.environ.get('AUDIT_WAL_PATH') or 'instance/audit.wal'
+    AUDIT_DEAD_LETTER_PATH = os.environ.get('AUDIT_DEAD_LETTER_PATH') or 'instance/audit.deadletter'
+    AUDIT_WAL_FSYNC = True
+    AUDIT_BATCH_SIZE = 500
+    AUDIT_FLUSH_INTERVAL = 2.0
+    AUDIT_SYNC_DECISIONS = frozenset({'termination'})
+
+    # Employee timeline cache
+    TIMELINE_CACHE_SIZE = 1000
+    TIMELINE_REFRESH_INTERVAL = 5.0
+    TIMELINE_LATE_ROW_GRACE = 60.0
+
+    # Read endpoint responses: shared table version counters (redis://) for
+    # ETags across instances, and the smallest body worth compressing
+    RESPONSE_VERSION_URL = os.environ.get('RESPONSE_VERSION_URL') or os.environ.get('REDIS_URL')
+    RESPONSE_COMPRESS_MIN_SIZE = 1024
+    # Number of app instances behind the proxy; set by deploy/serve.py
+    APP_INSTANCES = int(os.environ.get('APP_INSTANCES') or 1)
+
+    # Decision policy definition (JSON, or YAML with PyYAML) and how often
+    # workers check it for changes
+    POLICY_PATH = os.environ.get('POLICY_PATH') or \
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'policies.json')
+    POLICY_RELOAD_INTERVAL = 5.0
+
     # JWT configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
@@ -27,6 +53,7 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
+    MAIL_TIMEOUT = float(os.environ.get('MAIL_TIMEOUT') or 10)
 
     # Rate limiting
     RATELIMIT_DEFAULT = "100/hour"
@@ -35,6 +62,29 @@ class Config:
     # Websocket configuration
     WEBSOCKET_PING_INTERVAL = 25
     WEBSOCKET_PING_TIMEOUT = 120
+    # redis://, amqp:// or memory:// (in-process, for tests); unset keeps sockets per process
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+
+    # Notification delivery: concurrent sends and timeout (seconds) per channel
+    NOTIFICATION_CHANNEL_LIMITS = {'email': 10, 'websocket': 50}
+    NOTIFICATION_CHANNEL_TIMEOUTS = {'email': 15.0, 'websocket': 2.0}
+
+    # HR alert digests: seconds of quiet before sending, and the longest an
+    # alert may wait. Listed actions and decision types are never digested.
+    NOTIFICATION_DIGEST_ENABLED = os.environ.get('NOTIFICATION_DIGEST_ENABLED', 'true').lower() == 'true'
+    NOTIFICATION_DIGEST_WINDOW = 30
+    NOTIFICATION_DIGEST_MAX_DELAY = 300
+    NOTIFICATION_DIGEST_BYPASS = frozenset({'termination', 'account_deactivation'})
+
+    # Access schedule enforcement
+    ACCESS_SCHEDULER_ENABLED = os.environ.get('ACCESS_SCHEDULER_ENABLED', 'true').lower() == 'true'
+    ACCESS_EXPIRY_NOTICE = timedelta(hours=int(os.environ.get('ACCESS_EXPIRY_NOTICE_HOURS') or 72))
+    ACCESS_SCHEDULER_BATCH_SIZE = 500
+    ACCESS_SCHEDULER_MAX_SLEEP = 3600
+    ACCESS_SCHEDULER_LOCK_PATH = os.environ.get('ACCESS_SCHEDULER_LOCK_PATH') or 'instance/access_scheduler.lock'
+    ACCESS_SCHEDULER_SYNC_INTERVAL = 30
+    ACCESS_SCHEDULER_RETRY_BASE = 30
+    ACCESS_SCHEDULER_RETRY_MAX = 3600
 
 class DevelopmentConfig(Config):
     DEBUG = True
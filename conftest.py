@@ -0,0 +1 @@
+# Lets tests import the application packages (models, services, ...) from the repository root
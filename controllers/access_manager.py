@@ -2,20 +2,22 @@ from datetime import datetime
 import logging
 from typing import Dict, List, Optional, Tuple
 
-from flask import current_app
+from sqlalchemy import and_, update
 from sqlalchemy.exc import SQLAlchemyError
 
-from hr_automation.models.models import AccessControl, Employee, DecisionLog
-from hr_automation.services.notification_service import NotificationService
-from hr_automation.services.decision_service import DecisionService
-from hr_automation.config.config import Config
+from models.models import AccessControl, Employee, DecisionLog, db
+from services.notification_service import NotificationService
+from services.decision_service import DecisionService
+from services.audit_writer import audit_writer
+from services.timeline_service import timeline_service
+from config.config import Config
 
 logger = logging.getLogger(__name__)
 
 class AccessManager:
     def __init__(self):
         self.notification_service = NotificationService()
-        self.decision_service = DecisionService()
+        self.decision_service = DecisionService(self.notification_service)
         
     def modify_access(self, employee_id: int, access_type: str, 
                      action: str, reason: str) -> Tuple[bool, str]:
@@ -48,22 +50,13 @@ class AccessManager:
                     access_type=access_type,
                     is_active=False
                 )
-                current_app.db.session.add(access_record)
+                db.session.add(access_record)
             
             # Update access status
             prev_status = access_record.is_active
             access_record.is_active = (action == 'grant')
             access_record.last_modified = datetime.utcnow()
             
-            # Log the decision
-            decision_log = DecisionLog(
-                employee_id=employee_id,
-                decision_type=f"{action}_{access_type}_access",
-                reason=reason,
-                timestamp=datetime.utcnow()
-            )
-            current_app.db.session.add(decision_log)
-            
             # Notify relevant parties
             self.notification_service.send_access_notification(
                 employee=employee,
@@ -72,12 +65,24 @@ class AccessManager:
                 reason=reason
             )
             
-            current_app.db.session.commit()
+            # The audit record goes to the write-ahead log as part of this
+            # commit; revocations are written through so the audit trail is
+            # never behind them
+            audit_writer.stage(DecisionLog(
+                employee_id=employee_id,
+                decision_type=f"{action}_{access_type}_access",
+                decision_category='access',
+                access_type=access_type,
+                decision_data={'action': action, 'reason': reason},
+                automated_decision=False
+            ), flush=(action == 'revoke'))
+            
+            db.session.commit()
             
             return True, f"Successfully {action}ed {access_type} access"
             
         except SQLAlchemyError as e:
-            current_app.db.session.rollback()
+            db.session.rollback()
             logger.error(f"Database error modifying access: {str(e)}")
             return False, "Database error occurred"
         except Exception as e:
@@ -126,6 +131,72 @@ class AccessManager:
             results[emp_id] = success
         return results
 
+    def apply_scheduled_changes(self, records: List[AccessControl], action: str,
+                                reason: str) -> List[int]:
+        """
+        Grant or revoke many scheduled access records in one transaction
+
+        A single UPDATE changes every record that is still pending (grant)
+        or active (revoke) and whose date has passed; one audit row per
+        changed record is staged with it. Employees are notified after the
+        commit.
+
+        Args:
+            records: AccessControl records, with employees loaded
+            action: Grant or revoke
+            reason: Reason recorded for every change
+
+        Returns:
+            IDs of the records that were changed
+
+        Raises:
+            SQLAlchemyError: Nothing was changed
+        """
+        if not records:
+            return []
+
+        now = datetime.utcnow()
+        if action == 'grant':
+            new_status = 'active'
+            still_due = and_(AccessControl.status == 'pending', AccessControl.start_date <= now)
+        else:
+            new_status = 'expired'
+            still_due = and_(AccessControl.status == 'active', AccessControl.end_date <= now)
+
+        by_id = {record.id: record for record in records}
+        emails = {record.id: record.employee.email for record in records}
+        try:
+            changed = db.session.execute(
+                update(AccessControl)
+                .where(AccessControl.id.in_(list(by_id)), still_due)
+                .values(status=new_status, last_modified=now)
+                .returning(AccessControl.id)
+            ).scalars().all()
+
+            for record_id in changed:
+                record = by_id[record_id]
+                audit_writer.stage(DecisionLog(
+                    employee_id=record.employee_id,
+                    decision_type=f"{action}_{record.access_type}_access",
+                    decision_category='access',
+                    access_type=record.access_type,
+                    decision_data={'action': action, 'reason': reason,
+                                   'access_control_id': record_id},
+                    automated_decision=True
+                ), flush=(action == 'revoke'))
+
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Database error applying scheduled access changes: {str(e)}")
+            raise
+
+        for record_id in changed:
+            self.notification_service.send_access_change_alert(
+                emails[record_id], by_id[record_id].access_type, new_status, reason
+            )
+        return changed
+
     def revoke_all_access(self, employee_id: int, 
                          reason: str) -> Dict[str, bool]:
         """Revoke all access types for an employee"""
@@ -142,23 +213,14 @@ class AccessManager:
                           access_type: Optional[str] = None) -> List[Dict]:
         """Get access modification history for an employee"""
         try:
-            query = DecisionLog.query.filter(
-                DecisionLog.employee_id == employee_id,
-                DecisionLog.decision_type.like('%_access')
-            )
-            
-            if access_type:
-                query = query.filter(
-                    DecisionLog.decision_type.like(f'%_{access_type}_access')
-                )
-                
-            logs = query.order_by(DecisionLog.timestamp.desc()).all()
+            entries = timeline_service.iter_entries(employee_id, kinds={'access'})
             
             return [{
-                'decision_type': log.decision_type,
-                'reason': log.reason,
-                'timestamp': log.timestamp
-            } for log in logs]
+                'decision_type': entry['type'],
+                'reason': (entry['details'] or {}).get('reason'),
+                'timestamp': datetime.fromisoformat(entry['timestamp'])
+            } for entry in entries
+                if not access_type or entry['access_type'] == access_type]
             
         except Exception as e:
             logger.error(f"Error getting access history: {str(e)}")
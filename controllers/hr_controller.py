@@ -4,21 +4,25 @@ from models.models import Employee, AccessControl, PerformanceReview, DecisionLo
 from services.notification_service import NotificationService
 from services.decision_service import DecisionService
 from controllers.access_manager import AccessManager
+from services.audit_writer import audit_writer
+from services.timeline_service import TIMELINE_TABLES, timeline_service
+from services.response_cache import cached_response
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 
 hr_controller = Blueprint('hr_controller', __name__)
 notification_service = NotificationService()
-decision_service = DecisionService()
+decision_service = DecisionService(notification_service)
 access_manager = AccessManager()
 
 logger = logging.getLogger(__name__)
 
 @hr_controller.route('/api/employees', methods=['GET'])
+@cached_response('employees')
 def get_employees():
     try:
         employees = Employee.query.all()
-        return jsonify([emp.to_dict() for emp in employees]), 200
+        return [emp.to_dict() for emp in employees], 200
     except SQLAlchemyError as e:
         logger.error(f"Database error retrieving employees: {str(e)}")
         return jsonify({"error": "Failed to retrieve employees"}), 500
@@ -46,14 +50,12 @@ def create_performance_review(employee_id):
         review.requires_hr_review = True
         
         db.session.add(review)
-        
-        decision_log = DecisionLog(
+        audit_writer.stage(DecisionLog(
             employee_id=employee_id,
             decision_type="performance_review",
-            decision_details=automated_decision,
-            timestamp=datetime.now()
-        )
-        db.session.add(decision_log)
+            decision_data={'recommendation': automated_decision},
+            automated_decision=True
+        ))
         db.session.commit()
 
         notification_service.send_review_notification(
@@ -69,13 +71,14 @@ def create_performance_review(employee_id):
         return jsonify({"error": "Failed to create performance review"}), 500
 
 @hr_controller.route('/api/reviews/pending', methods=['GET'])
+@cached_response('performance_reviews')
 def get_pending_reviews():
     try:
         pending_reviews = PerformanceReview.query.filter_by(
             requires_hr_review=True,
             hr_reviewed=False
         ).all()
-        return jsonify([review.to_dict() for review in pending_reviews]), 200
+        return [review.to_dict() for review in pending_reviews], 200
     except SQLAlchemyError as e:
         logger.error(f"Database error retrieving pending reviews: {str(e)}")
         return jsonify({"error": "Failed to retrieve pending reviews"}), 500
@@ -109,6 +112,11 @@ def approve_review(review_id):
         logger.error(f"Database error approving review: {str(e)}")
         return jsonify({"error": "Failed to approve review"}), 500
 
+@hr_controller.route('/api/employees/<int:employee_id>/access', methods=['GET'])
+@cached_response('access_controls')
+def get_employee_access_status(employee_id):
+    return access_manager.get_employee_access_status(employee_id), 200
+
 @hr_controller.route('/api/employees/<int:employee_id>/access', methods=['PUT'])
 def modify_access(employee_id):
     try:
@@ -127,16 +135,14 @@ def modify_access(employee_id):
                                                 access_control.building_access)
         access_control.system_access = data.get('system_access', 
                                               access_control.system_access)
-        access_control.last_modified = datetime.now()
+        access_control.last_modified = datetime.utcnow()
         
-        decision_log = DecisionLog(
+        audit_writer.stage(DecisionLog(
             employee_id=employee_id,
             decision_type="access_modification",
-            decision_details=str(data),
-            timestamp=datetime.now()
-        )
-        db.session.add(decision_log)
-        
+            decision_data=data,
+            automated_decision=False
+        ))
         db.session.commit()
         
         notification_service.send_access_modification_notification(
@@ -150,3 +156,22 @@ def modify_access(employee_id):
         db.session.rollback()
         logger.error(f"Database error modifying access: {str(e)}")
         return jsonify({"error": "Failed to modify access"}), 500
+
+@hr_controller.route('/api/employees/<int:employee_id>/timeline', methods=['GET'])
+@cached_response(*TIMELINE_TABLES)
+def get_employee_timeline(employee_id):
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        kinds = request.args.get('kind')
+        page = timeline_service.get_timeline(
+            employee_id,
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            kinds=set(kinds.split(',')) if kinds else None
+        )
+        return page, 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except SQLAlchemyError as e:
+        logger.error(f"Database error retrieving timeline: {str(e)}")
+        return jsonify({"error": "Failed to retrieve employee timeline"}), 500
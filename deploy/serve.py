@@ -0,0 +1,73 @@
+"""
+Run several single-worker gunicorn instances, one per port.
+
+Flask-SocketIO keeps each client's session in the worker that accepted
+it, and gunicorn balances requests across its workers without regard to
+that, so a gunicorn master may only run one Socket.IO worker. To use more
+cores, start one instance per port and put a proxy that pins each client
+to one port in front (see deploy/nginx.conf):
+
+    SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/0 \\
+        python -m deploy.serve --instances 4 --base-port 5001
+
+SIGINT/SIGTERM are passed on, so every instance drains through gunicorn's
+worker_exit hook; if one instance exits the others are stopped too.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+
+
+def start_instances(instances: int, base_port: int, host: str = '127.0.0.1',
+                    **popen_kwargs) -> list:
+    procs = []
+    for index in range(instances):
+        env = dict(os.environ, FLASK_HOST=host, FLASK_PORT=str(base_port + index),
+                   APP_INSTANCES=str(instances))
+        procs.append(subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+            env=env, **popen_kwargs
+        ))
+    return procs
+
+
+def stop_instances(procs: list) -> None:
+    for proc in procs:
+        if proc.poll() is None:
+            proc.send_signal(signal.SIGTERM)
+    for proc in procs:
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--instances', type=int,
+                        default=int(os.getenv('WEB_CONCURRENCY') or multiprocessing.cpu_count()))
+    parser.add_argument('--base-port', type=int, default=5001)
+    parser.add_argument('--host', default='127.0.0.1')
+    args = parser.parse_args()
+
+    if args.instances > 1 and not os.getenv('SOCKETIO_MESSAGE_QUEUE'):
+        print("warning: SOCKETIO_MESSAGE_QUEUE is not set; websocket broadcasts "
+              "will only reach clients of the instance that sent them", file=sys.stderr)
+
+    procs = start_instances(args.instances, args.base_port, args.host)
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while not stopping and all(proc.poll() is None for proc in procs):
+        time.sleep(0.5)
+    stop_instances(procs)
+
+
+if __name__ == '__main__':
+    main()
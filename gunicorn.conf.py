@@ -0,0 +1,35 @@
+"""
+Gunicorn settings for one app instance.
+
+Flask-SocketIO sessions live in the worker that accepted the client and
+gunicorn does not route a client back to the same worker, so an instance
+runs exactly one worker; more workers fail with "Invalid session". Scale
+out with one instance per port behind a sticky proxy (deploy/serve.py and
+deploy/nginx.conf), with SOCKETIO_MESSAGE_QUEUE pointing at a shared
+broker so broadcasts reach clients of every instance.
+"""
+import os
+
+bind = f"{os.getenv('FLASK_HOST', '0.0.0.0')}:{os.getenv('FLASK_PORT', '5000')}"
+workers = 1
+
+# Threaded workers keep the scheduler, audit writer and notification
+# threads working as written; Flask-SocketIO serves websockets on them
+# through simple-websocket.
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS') or 50)
+
+# Each worker builds its own app so background threads are never forked
+preload_app = False
+
+# Time given to a worker to finish requests and drain buffers on SIGTERM
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT') or 30)
+timeout = 60
+keepalive = 5
+
+
+def worker_exit(server, worker):
+    # In-flight requests drain first out of the same graceful_timeout, so
+    # the services get half of it as one budget for all of them
+    from app import shutdown_services
+    shutdown_services(timeout=graceful_timeout / 2)
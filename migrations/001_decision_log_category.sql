@@ -0,0 +1,21 @@
+-- Timeline columns on decision_logs (see models.decision_category)
+ALTER TABLE decision_logs ADD COLUMN IF NOT EXISTS decision_category VARCHAR(20);
+ALTER TABLE decision_logs ADD COLUMN IF NOT EXISTS access_type VARCHAR(50);
+
+-- Backfill existing rows with the same rules the model defaults apply
+UPDATE decision_logs SET decision_category = CASE
+        WHEN decision_type LIKE '%\_access' OR decision_type LIKE 'access\_%' THEN 'access'
+        WHEN decision_type = 'performance_review' THEN 'review'
+        ELSE 'decision'
+    END
+WHERE decision_category IS NULL;
+
+UPDATE decision_logs SET access_type = split_part(decision_type, '_', 2)
+WHERE access_type IS NULL AND decision_type ~ '^[^_]+_[^_]+_access$';
+
+ALTER TABLE decision_logs ALTER COLUMN decision_category SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_decision_logs_employee_category
+    ON decision_logs (employee_id, decision_category, id);
+CREATE INDEX IF NOT EXISTS ix_performance_reviews_employee
+    ON performance_reviews (employee_id, id);
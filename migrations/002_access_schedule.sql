@@ -0,0 +1,7 @@
+-- Scheduled access enforcement (see services/access_scheduler.py)
+ALTER TABLE access_controls ADD COLUMN IF NOT EXISTS notice_sent_for TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS ix_access_controls_start_date ON access_controls (start_date);
+CREATE INDEX IF NOT EXISTS ix_access_controls_end_date ON access_controls (end_date);
+CREATE INDEX IF NOT EXISTS ix_access_controls_status ON access_controls (status);
+CREATE INDEX IF NOT EXISTS ix_access_controls_last_modified ON access_controls (last_modified);
@@ -0,0 +1,4 @@
+-- Access records created before new records defaulted to 'pending' were
+-- active from creation even when their start date lay ahead
+UPDATE access_controls SET status = 'pending'
+WHERE status = 'active' AND start_date > (now() AT TIME ZONE 'utc');
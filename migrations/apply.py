@@ -0,0 +1,68 @@
+"""
+Apply pending SQL migrations to the configured database.
+
+Files named ``NNN_description.sql`` in this directory run in order, each
+in its own transaction, and are recorded in ``schema_migrations`` so a
+file is applied once. New installs get the full schema from
+``db.create_all()`` and only need the migrations marked as applied:
+
+    python -m migrations.apply            # apply pending migrations
+    python -m migrations.apply --mark     # record them without running
+"""
+import argparse
+import glob
+import logging
+import os
+
+from sqlalchemy import create_engine, text
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def pending_migrations(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version VARCHAR(255) PRIMARY KEY, "
+        "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+    for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, '[0-9]*.sql'))):
+        version = os.path.splitext(os.path.basename(path))[0]
+        if version not in applied:
+            yield version, path
+
+
+def apply(database_url: str, mark_only: bool = False) -> int:
+    """Run every pending migration; returns how many were applied"""
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        pending = list(pending_migrations(conn))
+
+    for version, path in pending:
+        with engine.begin() as conn:
+            if not mark_only:
+                with open(path, encoding='utf-8') as migration:
+                    conn.exec_driver_sql(migration.read())
+            conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:version)"),
+                         {'version': version})
+        logger.info(f"{'Marked' if mark_only else 'Applied'} migration {version}")
+    return len(pending)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--database-url', default=Config.SQLALCHEMY_DATABASE_URI)
+    parser.add_argument('--mark', action='store_true',
+                        help='record pending migrations as applied without running them')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    count = apply(args.database_url, args.mark)
+    print(f"{count} migration(s) {'marked' if args.mark else 'applied'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,9 @@ from werkzeug.security import generate_password_hash, check_password_hash
 
 db = SQLAlchemy()
 
+# JSONB on PostgreSQL, plain JSON elsewhere (e.g. SQLite in tests)
+JSONData = db.JSON().with_variant(JSONB(), 'postgresql')
+
 class Employee(db.Model):
     __tablename__ = 'employees'
     
@@ -20,9 +23,12 @@ class Employee(db.Model):
     status = db.Column(db.String(20), nullable=False, default='active')
     
     # Relationships
-    access_controls = relationship('AccessControl', back_populates='employee')
-    performance_reviews = relationship('PerformanceReview', back_populates='employee')
-    decision_logs = relationship('DecisionLog', back_populates='employee')
+    access_controls = relationship('AccessControl', back_populates='employee',
+                                   foreign_keys='AccessControl.employee_id')
+    performance_reviews = relationship('PerformanceReview', back_populates='employee',
+                                       foreign_keys='PerformanceReview.employee_id')
+    decision_logs = relationship('DecisionLog', back_populates='employee',
+                                 foreign_keys='DecisionLog.employee_id')
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -30,6 +36,11 @@ class Employee(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+def _default_access_status(context):
+    # Access that starts in the future waits for the scheduler to grant it
+    start_date = context.get_current_parameters().get('start_date')
+    return 'pending' if start_date and start_date > datetime.utcnow() else 'active'
+
 class AccessControl(db.Model):
     __tablename__ = 'access_controls'
     
@@ -37,10 +48,12 @@ class AccessControl(db.Model):
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
     access_type = db.Column(db.String(50), nullable=False)  # building, system
     access_level = db.Column(db.String(20), nullable=False)  # full, restricted, none
-    start_date = db.Column(db.DateTime, nullable=False)
-    end_date = db.Column(db.DateTime)
-    status = db.Column(db.String(20), nullable=False, default='active')
-    last_modified = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    start_date = db.Column(db.DateTime, nullable=False, index=True)
+    end_date = db.Column(db.DateTime, index=True)
+    status = db.Column(db.String(20), nullable=False, default=_default_access_status, index=True)  # pending, active, expired
+    notice_sent_for = db.Column(db.DateTime)  # start/end date the advance notice was sent for
+    last_modified = db.Column(db.DateTime, nullable=False, default=datetime.utcnow,
+                              onupdate=datetime.utcnow, index=True)
     modified_by = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
     
     # Relationships
@@ -49,12 +62,15 @@ class AccessControl(db.Model):
 
 class PerformanceReview(db.Model):
     __tablename__ = 'performance_reviews'
+    __table_args__ = (
+        db.Index('ix_performance_reviews_employee', 'employee_id', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
     review_date = db.Column(db.DateTime, nullable=False)
     reviewer_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
-    metrics = db.Column(JSONB, nullable=False)
+    metrics = db.Column(JSONData, nullable=False)
     overall_score = db.Column(db.Float, nullable=False)
     comments = db.Column(db.Text)
     status = db.Column(db.String(20), nullable=False, default='pending')
@@ -65,13 +81,34 @@ class PerformanceReview(db.Model):
     employee = relationship('Employee', back_populates='performance_reviews', foreign_keys=[employee_id])
     reviewer = relationship('Employee', foreign_keys=[reviewer_id])
 
+def decision_category(decision_type):
+    """Map a free-form decision type onto an indexed category"""
+    if decision_type.endswith('_access') or decision_type.startswith('access_'):
+        return 'access'
+    if decision_type == 'performance_review':
+        return 'review'
+    return 'decision'
+
+def _default_category(context):
+    return decision_category(context.get_current_parameters()['decision_type'])
+
+def _default_access_type(context):
+    # "<action>_<access type>_access", as written by AccessManager
+    parts = context.get_current_parameters()['decision_type'].split('_')
+    return parts[1] if len(parts) == 3 and parts[2] == 'access' else None
+
 class DecisionLog(db.Model):
     __tablename__ = 'decision_logs'
+    __table_args__ = (
+        db.Index('ix_decision_logs_employee_category', 'employee_id', 'decision_category', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
     decision_type = db.Column(db.String(50), nullable=False)  # promotion, termination, access_change
-    decision_data = db.Column(JSONB, nullable=False)
+    decision_category = db.Column(db.String(20), nullable=False, default=_default_category)  # access, review, decision
+    access_type = db.Column(db.String(50), default=_default_access_type)  # building, system
+    decision_data = db.Column(JSONData, nullable=False)
     automated_decision = db.Column(db.Boolean, nullable=False)
     hr_review_status = db.Column(db.String(20), nullable=False, default='pending')
     hr_reviewer_id = db.Column(db.Integer, db.ForeignKey('employees.id'))
@@ -0,0 +1,417 @@
+import fcntl
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import and_, event, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload
+
+from models.models import AccessControl, db
+from config.config import Config
+
+# Transition kinds kept in the index
+GRANT = 'grant'
+REVOKE = 'revoke'
+NOTICE = 'notice'
+
+Entry = Tuple[datetime, int, int, str, datetime]
+
+
+class AccessSnapshot(NamedTuple):
+    """The fields of an AccessControl row the scheduler indexes"""
+    id: int
+    status: str
+    start_date: Optional[datetime]
+    end_date: Optional[datetime]
+    notice_sent_for: Optional[datetime]
+
+    @classmethod
+    def of(cls, record: AccessControl) -> 'AccessSnapshot':
+        return cls(record.id, record.status, record.start_date, record.end_date,
+                   record.notice_sent_for)
+
+
+class AccessScheduler:
+    """
+    Enforces AccessControl start/end dates from a time-ordered index.
+
+    Upcoming transitions are kept in a heap keyed by due time, so the worker
+    thread sleeps until the earliest one is due instead of polling the table.
+    The index is rebuilt from the database on start, which makes the
+    database the only durable state: a transition that fell due while the
+    process was down is applied on the next start, and a notice already
+    sent is recorded in ``notice_sent_for`` so it is not sent again.
+
+    Records committed in this process are indexed by a session hook as the
+    commit happens. When several worker processes run the app, only the one
+    holding the lock file schedules; the others wait on the lock and take
+    over if the holder exits, and the holder picks up their writes by
+    re-reading rows whose ``last_modified`` moved since the previous sync.
+
+    A grant or revocation that fails is indexed again with exponential
+    backoff instead of being dropped.
+    """
+
+    def __init__(self, app=None):
+        self.logger = logging.getLogger(__name__)
+        self.app = None
+        self.access_manager = None
+        self._heap: List[Entry] = []
+        self._scheduled: Dict[int, Tuple] = {}
+        self._attempts: Dict[Tuple[int, str, datetime], int] = {}
+        self._synced_at: Optional[datetime] = None
+        self._leading = False
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.notice_period = app.config.get('ACCESS_EXPIRY_NOTICE', Config.ACCESS_EXPIRY_NOTICE)
+        self.batch_size = app.config.get('ACCESS_SCHEDULER_BATCH_SIZE',
+                                         Config.ACCESS_SCHEDULER_BATCH_SIZE)
+        self.max_sleep = app.config.get('ACCESS_SCHEDULER_MAX_SLEEP',
+                                        Config.ACCESS_SCHEDULER_MAX_SLEEP)
+        self.lock_path = app.config.get('ACCESS_SCHEDULER_LOCK_PATH',
+                                        Config.ACCESS_SCHEDULER_LOCK_PATH)
+        self.sync_interval = app.config.get('ACCESS_SCHEDULER_SYNC_INTERVAL',
+                                            Config.ACCESS_SCHEDULER_SYNC_INTERVAL)
+        self.retry_base = app.config.get('ACCESS_SCHEDULER_RETRY_BASE',
+                                         Config.ACCESS_SCHEDULER_RETRY_BASE)
+        self.retry_max = app.config.get('ACCESS_SCHEDULER_RETRY_MAX',
+                                        Config.ACCESS_SCHEDULER_RETRY_MAX)
+        app.extensions['access_scheduler'] = self
+
+    def start(self) -> None:
+        """
+        Start the worker thread; it loads pending transitions once it holds the lock
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        # Imported here to avoid a circular import with the controllers
+        from controllers.access_manager import AccessManager
+        if self.access_manager is None:
+            self.access_manager = AccessManager()
+
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._lead, name='access-scheduler', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the worker thread, letting an in-flight batch finish
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        self._leading = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def load(self) -> int:
+        """
+        Rebuild the index from records that still have a transition ahead
+        """
+        started = datetime.utcnow()
+        records = AccessControl.query.filter(or_(
+            AccessControl.status == 'pending',
+            and_(AccessControl.status == 'active',
+                 AccessControl.end_date.isnot(None))
+        )).yield_per(self.batch_size)
+
+        with self._lock:
+            self._heap = []
+            self._scheduled = {}
+            self._attempts = {}
+
+        count = 0
+        for record in records:
+            if self.schedule(record):
+                count += 1
+
+        self._synced_at = started
+        self.logger.info(f"Access scheduler indexed {count} pending transitions")
+        return count
+
+    def sync(self) -> int:
+        """
+        Index records modified since the last sync, e.g. by other processes
+
+        The window overlaps the previous one by a sync interval so a write
+        stamped just before its slow commit is not missed; records already
+        indexed unchanged are skipped.
+        """
+        started = datetime.utcnow()
+        since = (self._synced_at or started) - timedelta(seconds=self.sync_interval)
+        records = AccessControl.query.filter(
+            AccessControl.last_modified >= since
+        ).yield_per(self.batch_size)
+
+        count = 0
+        for record in records:
+            if self.schedule(record):
+                count += 1
+        self._synced_at = started
+        return count
+
+    def schedule(self, record) -> bool:
+        """
+        Index the next start/end transition of an access record
+
+        ``record`` is an AccessControl or an AccessSnapshot. Records that
+        are already indexed with the same state are skipped; entries made
+        stale by later edits are discarded when they come due.
+        """
+        if record.status == 'pending':
+            action, due = GRANT, record.start_date
+        elif record.status == 'active' and record.end_date:
+            action, due = REVOKE, record.end_date
+        else:
+            with self._lock:
+                self._scheduled.pop(record.id, None)
+            return False
+
+        state = (record.status, record.start_date, record.end_date)
+        with self._lock:
+            if self._scheduled.get(record.id) == state:
+                return False
+            self._scheduled[record.id] = state
+
+            # A notice whose time already passed is still sent straight
+            # away: an employee must hear about the change before it happens.
+            if record.notice_sent_for != due:
+                heapq.heappush(self._heap, (due - self.notice_period, next(self._counter),
+                                            record.id, NOTICE, due))
+            heapq.heappush(self._heap,
+                           (due, next(self._counter), record.id, action, due))
+            is_head = self._heap[0][2] == record.id
+
+        if is_head:
+            self._wakeup.set()
+        return True
+
+    def next_due(self) -> Optional[datetime]:
+        """Return the time of the earliest indexed transition"""
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def _lead(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+        self._lock_file = open(self.lock_path, 'a')
+        while not self._stopping.is_set():
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                self._stopping.wait(5)
+        else:
+            return
+
+        self._leading = True
+        try:
+            with self.app.app_context():
+                self.load()
+        except Exception as e:
+            self.logger.error(f"Error loading scheduled access changes: {str(e)}")
+        self.logger.info(f"Access scheduler started in process {os.getpid()}")
+        self._run()
+
+    def _run(self) -> None:
+        next_sync = time.monotonic() + self.sync_interval
+        while not self._stopping.is_set():
+            if time.monotonic() >= next_sync:
+                try:
+                    with self.app.app_context():
+                        self.sync()
+                except Exception as e:
+                    self.logger.error(f"Error syncing scheduled access changes: {str(e)}")
+                next_sync = time.monotonic() + self.sync_interval
+
+            next_due = self.next_due()
+            delay = self.max_sleep if next_due is None else \
+                (next_due - datetime.utcnow()).total_seconds()
+            delay = min(delay, next_sync - time.monotonic())
+
+            if delay > 0:
+                self._wakeup.wait(min(delay, self.max_sleep))
+                self._wakeup.clear()
+                continue
+
+            try:
+                with self.app.app_context():
+                    self.process_due()
+            except Exception as e:
+                self.logger.error(f"Error processing scheduled access changes: {str(e)}")
+                # Back off briefly rather than spinning on a failing batch
+                self._stopping.wait(5)
+
+    def process_due(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Apply every transition that is due, in batches
+
+        Returns counts of notices sent and grants/revocations applied.
+        """
+        now = now or datetime.utcnow()
+        stats = {NOTICE: 0, GRANT: 0, REVOKE: 0}
+
+        while True:
+            entries = self._pop_due(now)
+            if not entries:
+                return stats
+            try:
+                batch_stats = self._apply_batch(entries)
+            except Exception:
+                # Applied entries no longer match their records when retried
+                self._retry(entries)
+                raise
+            for kind, count in batch_stats.items():
+                stats[kind] += count
+
+    def _pop_due(self, now: datetime) -> List[Entry]:
+        entries = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(entries) < self.batch_size:
+                entries.append(heapq.heappop(self._heap))
+        return entries
+
+    def _apply_batch(self, entries: List[Entry]) -> Dict[str, int]:
+        stats = {NOTICE: 0, GRANT: 0, REVOKE: 0}
+        record_ids = {entry[2] for entry in entries}
+        records = {
+            record.id: record
+            for record in AccessControl.query.options(
+                joinedload(AccessControl.employee)
+            ).filter(AccessControl.id.in_(record_ids)).all()
+        }
+
+        notices = []
+        changes = defaultdict(list)
+        for entry in entries:
+            _, _, record_id, kind, due = entry
+            record = records.get(record_id)
+            if record is None or not self._is_current(record, kind, due):
+                self._attempts.pop((record_id, kind, due), None)
+                continue
+            if kind == NOTICE:
+                if record.notice_sent_for != due:
+                    notices.append((record, due))
+            else:
+                changes[kind].append((entry, record))
+
+        if notices:
+            for record, due in notices:
+                self._send_notice(record, due)
+                record.notice_sent_for = due
+                stats[NOTICE] += 1
+            try:
+                db.session.commit()
+            except SQLAlchemyError as e:
+                # The notices went out; at worst they are sent again after a restart
+                db.session.rollback()
+                self.logger.error(f"Database error recording access notices: {str(e)}")
+
+        for action, batch in changes.items():
+            reason = f"Scheduled access {'start' if action == GRANT else 'end'} date reached"
+            try:
+                changed = set(self.access_manager.apply_scheduled_changes(
+                    [record for _, record in batch], action, reason
+                ))
+            except SQLAlchemyError as e:
+                self.logger.error(f"Database error applying scheduled {action}s: {str(e)}")
+                self._retry([entry for entry, _ in batch])
+                continue
+
+            for entry, record in batch:
+                self._attempts.pop((entry[2], action, entry[4]), None)
+                if record.id in changed:
+                    stats[action] += 1
+                    # A granted record may now have an end date to enforce
+                    if action == GRANT:
+                        self.schedule(record)
+
+        return stats
+
+    def _retry(self, entries: List[Entry]) -> None:
+        """Index failed entries again, backing off exponentially per entry"""
+        now = datetime.utcnow()
+        with self._lock:
+            for _, _, record_id, kind, due in entries:
+                key = (record_id, kind, due)
+                attempt = self._attempts[key] = self._attempts.get(key, 0) + 1
+                delay = min(self.retry_base * 2 ** (attempt - 1), self.retry_max)
+                heapq.heappush(self._heap, (now + timedelta(seconds=delay), next(self._counter),
+                                            record_id, kind, due))
+                self.logger.warning(f"Retrying scheduled {kind} of access record {record_id} "
+                                    f"in {delay}s (attempt {attempt})")
+
+    @staticmethod
+    def _is_current(record: AccessControl, kind: str, due: datetime) -> bool:
+        """Check that an index entry still matches the record it was made for"""
+        if record.status == 'pending':
+            return kind in (NOTICE, GRANT) and record.start_date == due
+        if record.status == 'active':
+            return kind in (NOTICE, REVOKE) and record.end_date == due
+        return False
+
+    def _send_notice(self, record: AccessControl, due: datetime) -> None:
+        employee = record.employee
+        change = 'granted' if record.status == 'pending' else 'revoked'
+        details = (f"Your {record.access_type} access will be {change} "
+                   f"on {due:%Y-%m-%d %H:%M} UTC.")
+
+        notification_service = self.access_manager.notification_service
+        notification_service.notify_employee(employee.email, 'scheduled_access_change', details)
+        notification_service.notify_hr_personnel('scheduled_access_change', {
+            'employee_email': employee.email,
+            'access_type': record.access_type,
+            'change': change,
+            'effective': due.isoformat()
+        })
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_access_changes(session, flush_context):
+    changed = session.info.setdefault('access_changes', {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, AccessControl):
+            # Snapshot now: attributes are expired once the commit completes
+            changed[obj.id] = AccessSnapshot.of(obj)
+
+
+@event.listens_for(Session, 'after_commit')
+def _schedule_access_changes(session):
+    changed = session.info.pop('access_changes', None)
+    if not changed or not has_app_context():
+        return
+    scheduler = current_app.extensions.get('access_scheduler')
+    if scheduler is not None and scheduler._leading:
+        for snapshot in changed.values():
+            scheduler.schedule(snapshot)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_access_changes(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop('access_changes', None)
+
+
+access_scheduler = AccessScheduler()
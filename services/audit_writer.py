@@ -0,0 +1,441 @@
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import (DBAPIError, DisconnectionError, InterfaceError, OperationalError,
+                            SQLAlchemyError, TimeoutError)
+from sqlalchemy.orm import Session
+
+from models.models import DecisionLog, db
+from config.config import Config
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'$dt': value.isoformat()}
+    return str(value)
+
+
+def _decode(obj: Dict):
+    if set(obj) == {'$dt'}:
+        return datetime.fromisoformat(obj['$dt'])
+    return obj
+
+
+def _is_transient(error: SQLAlchemyError) -> bool:
+    """Errors that say the database is unreachable rather than that a row is bad"""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, (OperationalError, InterfaceError, TimeoutError,
+                              DisconnectionError))
+
+
+class AuditWriter:
+    """
+    Write-behind buffer for DecisionLog rows.
+
+    Records are appended to a per-process write-ahead file before they are
+    buffered, then inserted in batches once the buffer reaches
+    ``batch_size`` or ``flush_interval`` seconds pass. The write-ahead file
+    is rotated into a segment for every flush and the segment is deleted
+    only after its rows are stored, so records that never reached the
+    database are replayed on the next start.
+
+    Records describing a change made in the caller's transaction are
+    ``stage``d: they reach the write-ahead file before that transaction
+    commits and are cancelled in it if the transaction rolls back.
+
+    A batch that fails for a reason other than a lost connection is retried
+    row by row; rows that still fail go to a dead-letter file so the rest
+    of the audit trail keeps flowing.
+    """
+
+    def __init__(self, app=None):
+        self.logger = logging.getLogger(__name__)
+        self.app = None
+        self._buffer: List[Dict] = []
+        self._segments: List[str] = []
+        self._pending: Dict[str, List[Dict]] = {}
+        self._wal = None
+        self._wal_seq = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[List[Dict]], None]] = []
+        self._metrics = {
+            'flushes': 0,
+            'rows_flushed': 0,
+            'flush_failures': 0,
+            'dead_lettered': 0,
+            'last_flush_latency_ms': 0.0,
+            'max_flush_latency_ms': 0.0
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.wal_path = app.config.get('AUDIT_WAL_PATH', Config.AUDIT_WAL_PATH)
+        self.dead_letter_path = app.config.get('AUDIT_DEAD_LETTER_PATH',
+                                               Config.AUDIT_DEAD_LETTER_PATH)
+        self.batch_size = app.config.get('AUDIT_BATCH_SIZE', Config.AUDIT_BATCH_SIZE)
+        self.flush_interval = app.config.get('AUDIT_FLUSH_INTERVAL', Config.AUDIT_FLUSH_INTERVAL)
+        self.fsync = app.config.get('AUDIT_WAL_FSYNC', Config.AUDIT_WAL_FSYNC)
+        self.sync_decisions = app.config.get('AUDIT_SYNC_DECISIONS', Config.AUDIT_SYNC_DECISIONS)
+        app.extensions['audit_writer'] = self
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.wal_path)), exist_ok=True)
+        self._replay()
+        self._open_wal()
+
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+
+    def add(self, decision_log: DecisionLog, flush: bool = False) -> None:
+        """
+        Queue a standalone DecisionLog for insertion
+
+        The record is durable once this returns. Pass ``flush`` (or log a
+        decision type listed in AUDIT_SYNC_DECISIONS) to insert it before
+        returning; if the database is unreachable the failure is logged and
+        the row is retried from the write-ahead file like any other.
+        ``decision_log`` itself is never added to a session, so its ``id``
+        stays None.
+        """
+        row = self._row(decision_log)
+        with self._lock:
+            self._append([row])
+        try:
+            self._enqueue([row], flush)
+        except SQLAlchemyError as e:
+            # The row is durable in the WAL and will be retried
+            self.logger.error(f"Synchronous audit flush failed: {str(e)}")
+
+    def stage(self, decision_log: DecisionLog, flush: bool = False,
+              session: Optional[Session] = None) -> None:
+        """
+        Attach a DecisionLog to the current database transaction
+
+        The record is written to the write-ahead file as the transaction
+        commits, before the database commit itself, and is queued (or, with
+        ``flush``, inserted) once the commit succeeds. A rollback cancels it.
+        """
+        session = session or db.session()
+        if not session.in_transaction():
+            # Without a transaction a rollback would not reach our listener
+            session.begin()
+        session.info['audit_writer'] = self
+        session.info.setdefault('audit_staged', []).append((self._row(decision_log), flush))
+
+    def add_flush_listener(self, listener: Callable[[List[Dict]], None]) -> None:
+        """Register a callable that receives each batch of rows after it commits"""
+        self._listeners.append(listener)
+
+    def flush(self) -> int:
+        """
+        Insert everything buffered now; returns the number of rows written
+
+        Raises SQLAlchemyError only when the database cannot be reached, in
+        which case the rows stay buffered and in the write-ahead file.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+                if not rows:
+                    return 0
+                segments = self._segments + [self._rotate_wal()]
+                self._segments = []
+
+            started = time.perf_counter()
+            try:
+                with self.app.app_context():
+                    try:
+                        db.session.bulk_insert_mappings(DecisionLog, rows)
+                        db.session.commit()
+                        written = rows
+                    except SQLAlchemyError as e:
+                        db.session.rollback()
+                        if _is_transient(e):
+                            raise
+                        self.logger.warning(f"Audit batch rejected, retrying row by row: {str(e)}")
+                        written = self._insert_individually(rows)
+            except SQLAlchemyError as e:
+                self._metrics['flush_failures'] += 1
+                self.logger.error(f"Database error flushing audit log: {str(e)}")
+                unwritten = getattr(e, 'audit_unwritten', rows)
+                self._requeue(unwritten, segments)
+                raise
+
+            latency = (time.perf_counter() - started) * 1000
+            for segment in segments:
+                os.remove(segment)
+
+            self._metrics['flushes'] += 1
+            self._metrics['rows_flushed'] += len(written)
+            self._metrics['last_flush_latency_ms'] = round(latency, 3)
+            self._metrics['max_flush_latency_ms'] = max(self._metrics['max_flush_latency_ms'],
+                                                        round(latency, 3))
+
+            for listener in self._listeners:
+                try:
+                    listener(written)
+                except Exception as e:
+                    self.logger.error(f"Audit flush listener failed: {str(e)}")
+            return len(written)
+
+    def metrics(self) -> Dict:
+        """Buffer depth and flush statistics"""
+        with self._lock:
+            depth = len(self._buffer)
+        return dict(self._metrics, buffer_depth=depth)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the flush thread and write out what is left
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                if self._wal is not None:
+                    self._wal.close()
+                    self._wal = None
+
+    @staticmethod
+    def _row(decision_log: DecisionLog) -> Dict:
+        now = datetime.utcnow()
+        row = {
+            attr.key: getattr(decision_log, attr.key)
+            for attr in inspect(DecisionLog).column_attrs
+            if getattr(decision_log, attr.key) is not None
+        }
+        row.setdefault('created_at', now)
+        row.setdefault('updated_at', now)
+        return row
+
+    def _append(self, rows: List[Dict], txn: Optional[str] = None) -> None:
+        """Write rows to the write-ahead file and sync it; caller holds the lock"""
+        for row in rows:
+            line = dict(row, **{'$txn': txn}) if txn else row
+            self._wal.write(json.dumps(line, default=_encode) + '\n')
+        self._wal.flush()
+        if self.fsync:
+            os.fsync(self._wal.fileno())
+
+    def _enqueue(self, rows: List[Dict], flush: bool) -> None:
+        with self._lock:
+            self._buffer.extend(rows)
+            depth = len(self._buffer)
+
+        if flush or any(row.get('decision_type') in self.sync_decisions for row in rows):
+            self.flush()
+        elif depth >= self.batch_size:
+            self._wakeup.set()
+
+    def _prepare(self, rows: List[Dict]) -> str:
+        """Log rows of a transaction that is about to commit"""
+        txn = uuid.uuid4().hex
+        with self._lock:
+            self._append(rows, txn)
+            self._pending[txn] = rows
+        return txn
+
+    def _committed(self, txn: str, rows: List[Dict], flush: bool) -> None:
+        with self._lock:
+            self._pending.pop(txn, None)
+        self._enqueue(rows, flush)
+
+    def _aborted(self, txn: str) -> None:
+        with self._lock:
+            self._pending.pop(txn, None)
+            self._wal.write(json.dumps({'$abort': txn}) + '\n')
+            self._wal.flush()
+
+    def _insert_individually(self, rows: List[Dict]) -> List[Dict]:
+        """Insert rows one at a time, dead-lettering the ones the database rejects"""
+        written = []
+        for index, row in enumerate(rows):
+            try:
+                db.session.bulk_insert_mappings(DecisionLog, [row])
+                db.session.commit()
+                written.append(row)
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                if _is_transient(e):
+                    e.audit_unwritten = rows[index:]
+                    raise
+                self._dead_letter(row, e)
+        return written
+
+    def _dead_letter(self, row: Dict, error: Exception) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.dead_letter_path)), exist_ok=True)
+        with open(self.dead_letter_path, 'a', encoding='utf-8') as dead_letter:
+            dead_letter.write(json.dumps({
+                'row': row,
+                'error': str(error).splitlines()[0],
+                'failed_at': datetime.utcnow()
+            }, default=_encode) + '\n')
+            dead_letter.flush()
+            os.fsync(dead_letter.fileno())
+        self._metrics['dead_lettered'] += 1
+        self.logger.error(f"Audit record moved to dead-letter file: {str(error).splitlines()[0]}")
+
+    def _requeue(self, rows: List[Dict], segments: List[str]) -> None:
+        """Put unwritten rows back, consolidated into one segment"""
+        with self._lock:
+            segment = self._segment_path()
+            with open(segment, 'w', encoding='utf-8') as wal:
+                for row in rows:
+                    wal.write(json.dumps(row, default=_encode) + '\n')
+                wal.flush()
+                os.fsync(wal.fileno())
+            for old in segments:
+                os.remove(old)
+            self._buffer[:0] = rows
+            self._segments.insert(0, segment)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"Error in background audit flush: {str(e)}")
+
+    def _open_wal(self) -> None:
+        self._wal = open(self._active_path(), 'a', encoding='utf-8')
+
+    def _active_path(self) -> str:
+        # One WAL per process so workers sharing a directory never interleave
+        return f"{self.wal_path}.{os.getpid()}"
+
+    def _segment_path(self) -> str:
+        self._wal_seq += 1
+        return f"{self.wal_path}.{os.getpid()}.{time.time_ns()}.{self._wal_seq}"
+
+    def _rotate_wal(self) -> str:
+        """Move the current write-ahead file aside as a segment; caller holds the lock"""
+        self._wal.close()
+        segment = self._segment_path()
+        os.replace(self._active_path(), segment)
+        self._open_wal()
+        # Rows of transactions still committing must outlive the old segment
+        for txn, rows in self._pending.items():
+            self._append(rows, txn)
+        return segment
+
+    @staticmethod
+    def _owner_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _replay(self) -> None:
+        """Adopt and buffer write-ahead files left by processes that have exited"""
+        paths = sorted(glob.glob(f"{glob.escape(self.wal_path)}.*"))
+        if os.path.exists(self.wal_path):
+            paths.insert(0, self.wal_path)
+
+        entries: List[Tuple[Optional[str], Dict]] = []
+        aborted = set()
+        for path in paths:
+            suffix = path[len(self.wal_path) + 1:]
+            owner = suffix.split('.', 1)[0]
+            if owner.isdigit() and int(owner) != os.getpid() and self._owner_alive(int(owner)):
+                continue
+
+            # Claim the file first; another starting worker may race for it
+            segment = self._segment_path()
+            try:
+                os.replace(path, segment)
+            except FileNotFoundError:
+                continue
+
+            with open(segment, encoding='utf-8') as wal:
+                for line in wal:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line, object_hook=_decode)
+                    except ValueError:
+                        # A torn final line means the record was never acknowledged
+                        self.logger.warning(f"Skipping unreadable audit WAL entry in {path}")
+                        continue
+                    if '$abort' in record:
+                        aborted.add(record['$abort'])
+                    else:
+                        entries.append((record.pop('$txn', None), record))
+            self._segments.append(segment)
+
+        # A row whose transaction reached the WAL but neither committed nor
+        # rolled back before the crash is kept: the change may have landed.
+        seen = set()
+        for txn, row in entries:
+            if txn in aborted:
+                continue
+            # Pending rows are rewritten on rotation, so one may appear twice
+            key = json.dumps([txn, row], sort_keys=True, default=_encode) if txn else None
+            if key is not None:
+                if key in seen:
+                    continue
+                seen.add(key)
+            self._buffer.append(row)
+
+        if self._buffer:
+            self.logger.info(f"Replaying {len(self._buffer)} audit records from WAL")
+            self._wakeup.set()
+
+
+@event.listens_for(Session, 'before_commit')
+def _log_staged_rows(session):
+    staged = session.info.get('audit_staged')
+    if staged:
+        writer = session.info['audit_writer']
+        session.info['audit_txn'] = writer._prepare([row for row, _ in staged])
+
+
+@event.listens_for(Session, 'after_commit')
+def _queue_staged_rows(session):
+    staged = session.info.pop('audit_staged', None)
+    txn = session.info.pop('audit_txn', None)
+    if staged and txn:
+        writer = session.info['audit_writer']
+        try:
+            writer._committed(txn, [row for row, _ in staged], any(flush for _, flush in staged))
+        except SQLAlchemyError as e:
+            # The rows are durable in the WAL and will be retried
+            writer.logger.error(f"Synchronous audit flush failed: {str(e)}")
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _cancel_staged_rows(session, previous_transaction):
+    if previous_transaction.nested:
+        return
+    session.info.pop('audit_staged', None)
+    txn = session.info.pop('audit_txn', None)
+    if txn:
+        session.info['audit_writer']._aborted(txn)
+
+
+audit_writer = AuditWriter()
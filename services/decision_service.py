@@ -1,12 +1,17 @@
-from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from sqlalchemy.exc import SQLAlchemyError
-from models.models import Employee, DecisionLog, PerformanceReview
+from models.models import Employee, DecisionLog, PerformanceReview, db
 from services.notification_service import NotificationService
+from services.audit_writer import audit_writer
+from services.policy_engine import PolicyEngine
+from services.policy_facts import FACT_LOADERS
 from config.config import Config
-from flask import current_app
 import logging
 
+# Compiled once per worker and reloaded when the policy file changes
+policy_engine = PolicyEngine(Config.POLICY_PATH, FACT_LOADERS,
+                             reload_interval=Config.POLICY_RELOAD_INTERVAL)
+
 class DecisionService:
     def __init__(self, notification_service: NotificationService):
         self.notification_service = notification_service
@@ -17,26 +22,8 @@ class DecisionService:
         Evaluates a performance review and returns a decision recommendation
         """
         try:
-            # Calculate weighted score
-            metrics = {
-                'goals_achieved': 0.3,
-                'quality_of_work': 0.3, 
-                'attendance': 0.2,
-                'teamwork': 0.2
-            }
-            
-            total_score = sum(
-                getattr(review, metric) * weight 
-                for metric, weight in metrics.items()
-            )
-
-            # Decision thresholds
-            if total_score >= 4.0:
-                return "promotion_recommended", total_score
-            elif total_score <= 2.0:
-                return "performance_improvement_needed", total_score
-            else:
-                return "satisfactory", total_score
+            # Weights and thresholds come from the decision policy
+            return policy_engine.policy.score(lambda metric: getattr(review, metric))
 
         except Exception as e:
             self.logger.error(f"Error evaluating performance review: {str(e)}")
@@ -47,44 +34,30 @@ class DecisionService:
         """
         Validates automated decisions against defined criteria and policies
         """
-        try:
-            employee = Employee.query.get(employee_id)
-            if not employee:
-                return False, "Employee not found"
-
-            if decision_type == "termination":
-                # Require multiple documented performance issues
-                performance_issues = DecisionLog.query.filter_by(
-                    employee_id=employee_id,
-                    decision_type="performance_improvement_needed"
-                ).count()
-                
-                if performance_issues < 2:
-                    return False, "Insufficient documentation for termination"
-                
-                # Require recent performance review
-                latest_review = PerformanceReview.query.filter_by(
-                    employee_id=employee_id
-                ).order_by(PerformanceReview.review_date.desc()).first()
-                
-                if not latest_review or \
-                   (datetime.now() - latest_review.review_date).days > 90:
-                    return False, "Recent performance review required"
+        return self.validate_decisions(decision_type, [employee_id])[employee_id]
 
-            elif decision_type == "promotion":
-                # Verify tenure and performance criteria
-                if employee.tenure_years < 1:
-                    return False, "Minimum tenure not met"
-                
-                high_performance_count = DecisionLog.query.filter_by(
-                    employee_id=employee_id,
-                    decision_type="promotion_recommended"
-                ).count()
-                
-                if high_performance_count < 2:
-                    return False, "Insufficient high performance records"
+    def validate_decisions(self, decision_type: str, 
+                           employee_ids: List[int]) -> Dict[int, Tuple[bool, str]]:
+        """
+        Validates a decision type for many employees in one pass
 
-            return True, "Decision criteria met"
+        Facts required by the policy are fetched with one query each for
+        the whole batch.
+        """
+        try:
+            existing = {
+                employee_id for (employee_id,) in 
+                Employee.query.with_entities(Employee.id).filter(
+                    Employee.id.in_(employee_ids)
+                ).all()
+            }
+            results = {
+                employee_id: (False, "Employee not found")
+                for employee_id in employee_ids if employee_id not in existing
+            }
+            if existing:
+                results.update(policy_engine.validate_many(decision_type, list(existing)))
+            return results
 
         except SQLAlchemyError as e:
             self.logger.error(f"Database error in decision validation: {str(e)}")
@@ -98,19 +71,22 @@ class DecisionService:
                     reviewer_id: Optional[int] = None) -> DecisionLog:
         """
         Logs decisions and their justifications
+
+        The returned DecisionLog carries the logged values but is not
+        attached to a session: the audit writer inserts a copy of the row,
+        so its ``id`` is None.
         """
         try:
             decision_log = DecisionLog(
                 employee_id=employee_id,
                 decision_type=decision_type,
-                outcome=outcome,
-                criteria_met=criteria_met,
-                reviewer_id=reviewer_id,
-                timestamp=datetime.now()
+                decision_data={'outcome': outcome, 'criteria_met': criteria_met},
+                automated_decision=reviewer_id is None,
+                hr_reviewer_id=reviewer_id
             )
             
-            current_app.db.session.add(decision_log)
-            current_app.db.session.commit()
+            # Buffered; decision types in AUDIT_SYNC_DECISIONS are written through
+            audit_writer.add(decision_log)
 
             # Notify relevant parties
             self.notification_service.send_decision_notification(
@@ -122,7 +98,7 @@ class DecisionService:
             return decision_log
 
         except SQLAlchemyError as e:
-            current_app.db.session.rollback()
+            db.session.rollback()
             self.logger.error(f"Database error in decision logging: {str(e)}")
             raise
         except Exception as e:
@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+from flask import current_app
+
+
+class DigestAlert:
+    """An HR alert held for a digest, counting repeats of the same alert"""
+
+    __slots__ = ('action_type', 'details', 'first_seen', 'count')
+
+    def __init__(self, action_type: str, details: Dict):
+        self.action_type = action_type
+        self.details = details
+        self.first_seen = datetime.now()
+        self.count = 1
+
+    def to_dict(self) -> Dict:
+        return {
+            'action_type': self.action_type,
+            'details': self.details,
+            'first_seen': self.first_seen.isoformat(),
+            'count': self.count
+        }
+
+
+class _RecipientBuffer:
+    __slots__ = ('app', 'window', 'max_delay', 'opened', 'last_added', 'alerts')
+
+    def __init__(self, app, window: float, max_delay: float, now: float):
+        self.app = app
+        self.window = window
+        self.max_delay = max_delay
+        self.opened = now
+        self.last_added = now
+        self.alerts: Dict[Hashable, DigestAlert] = {}
+
+
+class NotificationDigest:
+    """
+    Collects HR alerts per recipient and hands them off as one digest.
+
+    A recipient's buffer is flushed once no new alert has arrived for
+    ``window`` seconds, or ``max_delay`` seconds after its first alert,
+    whichever comes first. Both are read from the queuing app's
+    NOTIFICATION_DIGEST_WINDOW and NOTIFICATION_DIGEST_MAX_DELAY settings
+    when a buffer opens, falling back to the values given here. Alerts for
+    the same employee and action within a buffer are merged into one entry
+    with a repeat count.
+    """
+
+    def __init__(self, flush_handler: Callable[[Dict[str, List[DigestAlert]]], None],
+                 window: float, max_delay: float):
+        self.logger = logging.getLogger(__name__)
+        self.flush_handler = flush_handler
+        self.window = window
+        self.max_delay = max_delay
+        self._buffers: Dict[str, _RecipientBuffer] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    @staticmethod
+    def outcome(details: Dict) -> Optional[str]:
+        """What happened, whether the alert reports a status, decision or scheduled change"""
+        return details.get('status') or details.get('decision') or details.get('change')
+
+    @classmethod
+    def dedupe_key(cls, action_type: str, details: Dict) -> Hashable:
+        return (action_type, details.get('employee_email'),
+                details.get('access_type') or details.get('decision_type'), cls.outcome(details))
+
+    def add(self, recipients: Iterable[str], action_type: str, details: Dict) -> None:
+        """
+        Queue an alert for each recipient's next digest
+        """
+        app = current_app._get_current_object()
+        window = app.config.get('NOTIFICATION_DIGEST_WINDOW', self.window)
+        max_delay = app.config.get('NOTIFICATION_DIGEST_MAX_DELAY', self.max_delay)
+        key = self.dedupe_key(action_type, details)
+        now = time.monotonic()
+
+        with self._cond:
+            for recipient in recipients:
+                buffer = self._buffers.get(recipient)
+                if buffer is None:
+                    buffer = self._buffers[recipient] = _RecipientBuffer(app, window, max_delay, now)
+                alert = buffer.alerts.get(key)
+                if alert is None:
+                    buffer.alerts[key] = DigestAlert(action_type, details)
+                else:
+                    alert.count += 1
+                    alert.details = details
+                buffer.last_added = now
+
+            self._ensure_thread()
+            self._cond.notify()
+
+    def pending(self) -> int:
+        """Number of distinct alerts waiting across all recipients"""
+        with self._cond:
+            return sum(len(buffer.alerts) for buffer in self._buffers.values())
+
+    def flush(self) -> None:
+        """
+        Deliver every buffered digest now, regardless of windows
+        """
+        with self._cond:
+            due = self._take(lambda buffer: True)
+        self._deliver(due)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the flush thread after delivering what is buffered
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name='notification-digest', daemon=True
+            )
+            self._thread.start()
+
+    def _deadline(self, buffer: _RecipientBuffer) -> float:
+        return min(buffer.last_added + buffer.window, buffer.opened + buffer.max_delay)
+
+    def _take(self, is_due: Callable[[_RecipientBuffer], bool]) -> Dict[str, _RecipientBuffer]:
+        due = {recipient: buffer for recipient, buffer in self._buffers.items()
+               if is_due(buffer)}
+        for recipient in due:
+            del self._buffers[recipient]
+        return due
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                due = {}
+                while not due and not self._stopping:
+                    now = time.monotonic()
+                    due = self._take(lambda buffer: self._deadline(buffer) <= now)
+                    if not due:
+                        deadlines = [self._deadline(b) for b in self._buffers.values()]
+                        self._cond.wait(min(deadlines) - now if deadlines else None)
+                if not due:
+                    return
+            self._deliver(due)
+
+    def _deliver(self, due: Dict[str, _RecipientBuffer]) -> None:
+        if not due:
+            return
+
+        # Buffers share the app that queued them; group in case there are several
+        by_app = {}
+        for recipient, buffer in due.items():
+            by_app.setdefault(buffer.app, {})[recipient] = list(buffer.alerts.values())
+
+        for app, batches in by_app.items():
+            try:
+                with app.app_context():
+                    self.flush_handler(batches)
+            except Exception as e:
+                self.logger.error(f"Failed to deliver HR notification digest: {str(e)}")
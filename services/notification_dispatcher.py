@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from flask import current_app, has_app_context
+
+from config.config import Config
+
+
+class Delivery(NamedTuple):
+    """A single send on one channel, e.g. one email to one recipient"""
+    channel: str
+    send: Callable[..., Optional[bool]]
+    args: tuple
+
+
+class NotificationDispatcher:
+    """
+    Fans notification deliveries out concurrently on an asyncio loop.
+
+    The loop runs in its own thread so Flask request handlers can keep
+    calling the synchronous ``dispatch`` facade. Each channel has its own
+    concurrency limit and timeout, so a slow mail server cannot hold up
+    websocket alerts, and an event costs the slowest delivery rather than
+    the sum of all of them.
+
+    Flask-Mail and Flask-SocketIO are blocking libraries, so the actual
+    sends run on a thread pool that the loop awaits. Each channel has its
+    own pool, sized to its limit: a send that times out keeps its thread
+    (and its slot in the channel's limit) until the blocking call returns,
+    so a hung mail server can only exhaust the email pool. The senders set
+    socket timeouts of their own so such threads are eventually freed.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None,
+                 timeouts: Optional[Dict[str, float]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.limits = dict(limits or Config.NOTIFICATION_CHANNEL_LIMITS)
+        self.timeouts = dict(timeouts or Config.NOTIFICATION_CHANNEL_TIMEOUTS)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name='notification-dispatcher',
+                    daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def dispatch(self, deliveries: List[Delivery], wait: bool = True) -> List[bool]:
+        """
+        Send all deliveries concurrently
+
+        With ``wait`` the call blocks until every delivery has finished or
+        timed out and returns one success flag per delivery, in order.
+        """
+        if not deliveries:
+            return []
+
+        app = current_app._get_current_object() if has_app_context() else None
+        future = asyncio.run_coroutine_threadsafe(
+            self._dispatch_all(app, deliveries), self._ensure_loop()
+        )
+        if not wait:
+            return []
+        return future.result()
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the loop once queued deliveries have been handed to the pool
+        """
+        with self._lock:
+            loop, thread, executors = self._loop, self._thread, self._executors
+            self._loop = self._thread = None
+            self._executors = {}
+            self._semaphores = {}
+
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+        loop.close()
+
+    async def _dispatch_all(self, app, deliveries: List[Delivery]) -> List[bool]:
+        return list(await asyncio.gather(
+            *(self._deliver(app, delivery) for delivery in deliveries)
+        ))
+
+    def _executor(self, channel: str) -> ThreadPoolExecutor:
+        executor = self._executors.get(channel)
+        if executor is None:
+            executor = self._executors[channel] = ThreadPoolExecutor(
+                max_workers=self.limits.get(channel, 1),
+                thread_name_prefix=f"notification-{channel}"
+            )
+        return executor
+
+    async def _deliver(self, app, delivery: Delivery) -> bool:
+        semaphore = self._semaphores.get(delivery.channel)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.get(delivery.channel, 1))
+            self._semaphores[delivery.channel] = semaphore
+
+        timeout = self.timeouts.get(delivery.channel)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.logger.error(f"No free {delivery.channel} sender, dropping notification")
+            return False
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor(delivery.channel), self._call, app, delivery)
+        # The slot is held until the send really returns, not just until we stop waiting
+        future.add_done_callback(lambda done: self._release(semaphore, done))
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+            return result is not False
+        except asyncio.TimeoutError:
+            self.logger.error(f"Timed out sending {delivery.channel} notification")
+            return False
+        except Exception as e:
+            self.logger.error(f"Failed to send {delivery.channel} notification: {str(e)}")
+            return False
+
+    @staticmethod
+    def _release(semaphore: asyncio.Semaphore, future: asyncio.Future) -> None:
+        semaphore.release()
+        if not future.cancelled():
+            # Retrieve the outcome of sends nobody waited for any more
+            future.exception()
+
+    @staticmethod
+    def _call(app, delivery: Delivery) -> Optional[bool]:
+        if app is None:
+            return delivery.send(*delivery.args)
+        with app.app_context():
+            return delivery.send(*delivery.args)
+
+
+notification_dispatcher = NotificationDispatcher()
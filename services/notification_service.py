@@ -1,20 +1,62 @@
 from flask import current_app
-from flask_mail import Mail, Message
+from flask_mail import Connection, Mail, Message
 from flask_socketio import SocketIO, emit
-import json
 import logging
+import smtplib
 from datetime import datetime
 from typing import Dict, List, Optional
 
+from config.config import Config
+from services.notification_digest import DigestAlert, NotificationDigest
+from services.notification_dispatcher import Delivery, NotificationDispatcher, notification_dispatcher
+from services.notification_templates import RenderedNotification, templates
+
+class _TimeoutConnection(Connection):
+    """Flask-Mail connection whose SMTP socket gives up after MAIL_TIMEOUT"""
+
+    def __init__(self, mail, timeout: float):
+        super().__init__(mail)
+        self.timeout = timeout
+
+    def configure_host(self):
+        smtp_class = smtplib.SMTP_SSL if self.mail.use_ssl else smtplib.SMTP
+        host = smtp_class(self.mail.server, self.mail.port, timeout=self.timeout)
+        host.set_debuglevel(int(self.mail.debug))
+        if self.mail.use_tls:
+            resp, reply = host.starttls()
+            if resp != 220:
+                raise smtplib.SMTPResponseException(resp, reply)
+        if self.mail.username and self.mail.password:
+            host.login(self.mail.username, self.mail.password)
+        return host
+
+
+class TimeoutMail(Mail):
+    """
+    Flask-Mail with a socket timeout, so a hung mail server frees the
+    dispatcher's email thread instead of holding it indefinitely
+    """
+
+    def connect(self):
+        return _TimeoutConnection(current_app.extensions['mail'],
+                                  current_app.config.get('MAIL_TIMEOUT', Config.MAIL_TIMEOUT))
+
 # Initialize Flask-Mail and SocketIO
-mail = Mail()
+mail = TimeoutMail()
 socketio = SocketIO()
 
+def _notification_time() -> str:
+    # Minute precision keeps bodies identical across a bulk run so the
+    # template cache can share them
+    return datetime.now().strftime('%Y-%m-%d %H:%M')
+
 class NotificationService:
-    def __init__(self):
+    def __init__(self, dispatcher: Optional[NotificationDispatcher] = None):
         self.logger = logging.getLogger(__name__)
+        self.dispatcher = dispatcher or notification_dispatcher
 
-    def send_email_notification(self, recipient: str, subject: str, body: str) -> bool:
+    def send_email_notification(self, recipient: str, subject: str, body: str,
+                                html: Optional[str] = None) -> bool:
         """
         Send email notification using Flask-Mail
         """
@@ -23,7 +65,8 @@ class NotificationService:
                 subject=subject,
                 sender=current_app.config['MAIL_DEFAULT_SENDER'],
                 recipients=[recipient],
-                body=body
+                body=body,
+                html=html
             )
             mail.send(msg)
             self.logger.info(f"Email sent successfully to {recipient}")
@@ -32,92 +75,133 @@ class NotificationService:
             self.logger.error(f"Failed to send email to {recipient}: {str(e)}")
             return False
 
-    def send_websocket_notification(self, event: str, data: Dict) -> None:
+    def send_websocket_notification(self, event: str, data: Dict) -> bool:
         """
         Send real-time notification via websockets
         """
         try:
             socketio.emit(event, data)
             self.logger.info(f"Websocket notification sent: {event}")
+            return True
         except Exception as e:
             self.logger.error(f"Failed to send websocket notification: {str(e)}")
+            return False
 
-    def notify_hr_personnel(self, action_type: str, details: Dict) -> None:
+    def send_rendered_email(self, recipient: str, message: RenderedNotification) -> bool:
         """
-        Send notifications to HR personnel for review/approval
+        Send a rendered notification; its HTML body is built here, on the sending thread
         """
-        subject = f"HR Action Required: {action_type}"
-        body = f"""
-        Action Type: {action_type}
-        Details: {json.dumps(details, indent=2)}
-        Time: {datetime.now()}
-        
-        Please review this action in the HR dashboard.
+        return self.send_email_notification(recipient, message.subject, message.body,
+                                            message.html)
+
+    def email_delivery(self, recipient: str, message: RenderedNotification) -> Delivery:
+        return Delivery('email', self.send_rendered_email, (recipient, message))
+
+    def websocket_delivery(self, event: str, data: Dict) -> Delivery:
+        return Delivery('websocket', self.send_websocket_notification, (event, data))
+
+    def hr_deliveries(self, action_type: str, details: Dict) -> List[Delivery]:
+        """
+        Build the email and websocket deliveries for an HR review alert
         """
+        message = templates.render('hr_review_required', action_type=action_type,
+                                   details=details, time=_notification_time())
         
-        # Send email to all HR personnel
+        # Email every HR recipient plus one websocket broadcast
         hr_emails = current_app.config['HR_NOTIFICATION_EMAILS']
-        for email in hr_emails:
-            self.send_email_notification(email, subject, body)
-        
-        # Send websocket notification
-        self.send_websocket_notification('hr_review_required', {
+        deliveries = [self.email_delivery(email, message) for email in hr_emails]
+        deliveries.append(self.websocket_delivery('hr_review_required', {
             'action_type': action_type,
             'details': details,
             'timestamp': datetime.now().isoformat()
-        })
+        }))
+        return deliveries
 
-    def notify_employee(self, employee_email: str, action_type: str, details: str) -> None:
+    def hr_alert_deliveries(self, action_type: str, details: Dict) -> List[Delivery]:
         """
-        Send notification to affected employee
+        Route an HR alert to the digest, or return deliveries to send it now
+
+        Critical actions always go out immediately.
         """
-        subject = f"Important HR Update: {action_type}"
-        body = f"""
-        Dear Employee,
+        config = current_app.config
+        bypass = config.get('NOTIFICATION_DIGEST_BYPASS', Config.NOTIFICATION_DIGEST_BYPASS)
+        critical = action_type in bypass or details.get('decision_type') in bypass
 
-        This is to inform you about the following HR action:
-        
-        {details}
+        if critical or not config.get('NOTIFICATION_DIGEST_ENABLED',
+                                      Config.NOTIFICATION_DIGEST_ENABLED):
+            return self.hr_deliveries(action_type, details)
 
-        If you have any questions, please contact HR immediately.
+        notification_digest.add(config['HR_NOTIFICATION_EMAILS'], action_type, details)
+        return []
 
-        Time: {datetime.now()}
+    def notify_hr_personnel(self, action_type: str, details: Dict) -> None:
         """
-        
-        self.send_email_notification(employee_email, subject, body)
-        
-        # Send websocket notification if employee is online
-        self.send_websocket_notification('employee_notification', {
-            'employee_email': employee_email,
-            'action_type': action_type,
-            'details': details,
+        Send notifications to HR personnel for review/approval
+        """
+        self.dispatcher.dispatch(self.hr_alert_deliveries(action_type, details))
+
+    def send_hr_digest(self, batches: Dict[str, List[DigestAlert]]) -> None:
+        """
+        Send one summary email per HR recipient and one websocket frame
+        """
+        deliveries = []
+        merged = {}
+        for recipient, alerts in batches.items():
+            summary = '\n'.join(
+                f"- {alert.action_type}: {alert.details.get('employee_email', 'n/a')}"
+                f" ({NotificationDigest.outcome(alert.details) or 'updated'})"
+                + (f" x{alert.count}" if alert.count > 1 else '')
+                for alert in alerts
+            )
+            message = templates.render('hr_digest', count=len(alerts), summary=summary,
+                                       time=_notification_time())
+            deliveries.append(self.email_delivery(recipient, message))
+            for alert in alerts:
+                merged.setdefault(NotificationDigest.dedupe_key(alert.action_type, alert.details),
+                                  alert)
+
+        deliveries.append(self.websocket_delivery('hr_review_digest', {
+            'alerts': [alert.to_dict() for alert in merged.values()],
             'timestamp': datetime.now().isoformat()
-        })
+        }))
+        self.dispatcher.dispatch(deliveries)
+
+    def notify_employee(self, employee_email: str, action_type: str, details: str) -> None:
+        """
+        Send notification to affected employee
+        """
+        message = templates.render('employee_notification', action_type=action_type,
+                                   details=details, time=_notification_time())
+        
+        # Websocket notification reaches the employee if online
+        self.dispatcher.dispatch([
+            self.email_delivery(employee_email, message),
+            self.websocket_delivery('employee_notification', {
+                'employee_email': employee_email,
+                'action_type': action_type,
+                'details': details,
+                'timestamp': datetime.now().isoformat()
+            })
+        ])
 
     def send_access_change_alert(self, employee_email: str, access_type: str, 
                                status: str, reason: Optional[str] = None) -> None:
         """
         Send notification for access control changes
         """
-        subject = f"Access Control Update: {access_type}"
-        body = f"""
-        Access Update Information:
-        
-        Type: {access_type}
-        Status: {status}
-        Reason: {reason if reason else 'Not specified'}
-        Time: {datetime.now()}
+        message = templates.render('access_change', access_type=access_type, status=status,
+                                   reason=reason or 'Not specified',
+                                   time=_notification_time())
         
-        If this change was not expected, please contact HR immediately.
-        """
-        
-        self.send_email_notification(employee_email, subject, body)
-        self.notify_hr_personnel('access_change', {
-            'employee_email': employee_email,
-            'access_type': access_type,
-            'status': status,
-            'reason': reason
-        })
+        self.dispatcher.dispatch(
+            [self.email_delivery(employee_email, message)] +
+            self.hr_alert_deliveries('access_change', {
+                'employee_email': employee_email,
+                'access_type': access_type,
+                'status': status,
+                'reason': reason
+            })
+        )
 
     def send_performance_review_notification(self, employee_email: str, 
                                           review_date: datetime, 
@@ -125,46 +209,39 @@ class NotificationService:
         """
         Send notification for upcoming performance review
         """
-        subject = "Upcoming Performance Review"
-        body = f"""
-        Dear Employee,
-
-        Your performance review has been scheduled:
-        
-        Date: {review_date}
-        Reviewer: {reviewer}
-        
-        Please prepare necessary documentation and self-assessment.
-        """
+        message = templates.render('performance_review_scheduled',
+                                   review_date=review_date, reviewer=reviewer)
         
-        self.send_email_notification(employee_email, subject, body)
-        self.send_websocket_notification('performance_review_scheduled', {
-            'employee_email': employee_email,
-            'review_date': review_date.isoformat(),
-            'reviewer': reviewer
-        })
+        self.dispatcher.dispatch([
+            self.email_delivery(employee_email, message),
+            self.websocket_delivery('performance_review_scheduled', {
+                'employee_email': employee_email,
+                'review_date': review_date.isoformat(),
+                'reviewer': reviewer
+            })
+        ])
 
     def send_decision_notification(self, employee_email: str, decision_type: str, 
                                  decision: str, details: Dict) -> None:
         """
         Send notification for HR decisions
         """
-        subject = f"HR Decision Notification: {decision_type}"
-        body = f"""
-        Dear Employee,
-
-        A decision has been made regarding: {decision_type}
-        
-        Decision: {decision}
-        Details: {json.dumps(details, indent=2)}
-        
-        If you have any questions, please contact HR.
-        """
+        message = templates.render('decision_made', decision_type=decision_type,
+                                   decision=decision, details=details)
         
-        self.send_email_notification(employee_email, subject, body)
-        self.notify_hr_personnel('decision_made', {
-            'employee_email': employee_email,
-            'decision_type': decision_type,
-            'decision': decision,
-            'details': details
-        })
+        self.dispatcher.dispatch(
+            [self.email_delivery(employee_email, message)] +
+            self.hr_alert_deliveries('decision_made', {
+                'employee_email': employee_email,
+                'decision_type': decision_type,
+                'decision': decision,
+                'details': details
+            })
+        )
+
+
+notification_digest = NotificationDigest(
+    flush_handler=lambda batches: NotificationService().send_hr_digest(batches),
+    window=Config.NOTIFICATION_DIGEST_WINDOW,
+    max_delay=Config.NOTIFICATION_DIGEST_MAX_DELAY
+)
@@ -0,0 +1,289 @@
+import html
+import json
+import re
+import threading
+from collections import OrderedDict
+from textwrap import dedent
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+# Same output as the json.dumps(details, indent=2) the templates used to call
+_json_encoder = json.JSONEncoder(indent=2, default=str)
+
+# string.Template placeholder syntax: $$, $name or ${name}
+_PLACEHOLDER = re.compile(r'\$(?:(\$)|([_a-z][_a-z0-9]*)|\{([_a-z][_a-z0-9]*)\})', re.IGNORECASE)
+
+
+def dumps_details(details: Any) -> str:
+    """
+    Serialize notification details for display, using orjson when available
+
+    Keys keep the order the caller built them in, with either encoder.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            details,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+            default=str
+        ).decode()
+    return _json_encoder.encode(details)
+
+
+def _compile(template: str) -> Tuple[str, Tuple[str, ...]]:
+    """Translate a $-placeholder template into a str.format string and its fields"""
+    parts = []
+    fields = []
+    pos = 0
+    for match in _PLACEHOLDER.finditer(template):
+        parts.append(template[pos:match.start()].replace('{', '{{').replace('}', '}}'))
+        if match.group(1):
+            parts.append('$')
+        else:
+            name = match.group(2) or match.group(3)
+            parts.append('{' + name + '}')
+            fields.append(name)
+        pos = match.end()
+    parts.append(template[pos:].replace('{', '{{').replace('}', '}}'))
+    return ''.join(parts), tuple(dict.fromkeys(fields))
+
+
+class RenderedNotification:
+    """
+    Rendered subject and text body; the HTML body is rendered on first access
+    """
+    __slots__ = ('subject', 'body', '_html_format', '_values', '_html')
+
+    def __init__(self, subject: str, body: str, html_format: Optional[str] = None,
+                 values: Optional[Dict[str, str]] = None):
+        self.subject = subject
+        self.body = body
+        self._html_format = html_format
+        self._values = values
+        self._html = None
+
+    @property
+    def html(self) -> Optional[str]:
+        if self._html is None and self._html_format is not None:
+            self._html = self._html_format.format_map(
+                {key: html.escape(value) for key, value in self._values.items()}
+            )
+        return self._html
+
+
+class NotificationTemplate:
+    """
+    Subject, text and HTML templates compiled to format strings at registration
+    """
+
+    def __init__(self, subject: str, text: str, html_body: Optional[str] = None):
+        self.subject, subject_fields = _compile(subject)
+        self.text, text_fields = _compile(dedent(text).strip() + '\n')
+        self.html, html_fields = _compile(dedent(html_body).strip()) if html_body else (None, ())
+        self.fields = tuple(dict.fromkeys(subject_fields + text_fields + html_fields))
+
+    def render(self, values: Dict[str, str]) -> RenderedNotification:
+        return RenderedNotification(self.subject.format_map(values),
+                                    self.text.format_map(values), self.html, values)
+
+
+def _display(value: Any) -> str:
+    if type(value) is str:
+        return value
+    if isinstance(value, (dict, list)):
+        return dumps_details(value)
+    return '' if value is None else str(value)
+
+
+class TemplateRegistry:
+    """
+    Named notification templates with a bounded cache of rendered output.
+
+    Templates are compiled to ``str.format`` strings once. The context
+    values a template uses are converted to strings up front (dicts and
+    lists via ``dumps_details``, as given), and those strings, in the
+    template's field order, key the cache, so the same event fanned out to
+    many recipients, or repeated across a bulk run, is rendered once and
+    shared.
+    """
+
+    def __init__(self, cache_size: int = 1024):
+        self.cache_size = cache_size
+        self._templates: Dict[str, NotificationTemplate] = {}
+        self._cache: 'OrderedDict[tuple, RenderedNotification]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, name: str, subject: str, text: str,
+                 html_body: Optional[str] = None) -> None:
+        self._templates[name] = NotificationTemplate(subject, text, html_body)
+        with self._lock:
+            self._cache.clear()
+
+    def render(self, name: str, **context: Any) -> RenderedNotification:
+        """
+        Render a registered template, reusing earlier output for identical context
+        """
+        template = self._templates[name]
+        values = {field: _display(context[field]) for field in template.fields}
+        key = (name, *values.values())
+
+        with self._lock:
+            rendered = self._cache.get(key)
+            if rendered is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return rendered
+
+        rendered = template.render(values)
+
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = rendered
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return rendered
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+templates = TemplateRegistry()
+
+templates.register(
+    'hr_review_required',
+    subject="HR Action Required: $action_type",
+    text="""
+        Action Type: $action_type
+        Details: $details
+        Time: $time
+
+        Please review this action in the HR dashboard.
+    """,
+    html_body="""
+        <p><strong>Action Type:</strong> $action_type</p>
+        <pre>$details</pre>
+        <p><strong>Time:</strong> $time</p>
+        <p>Please review this action in the HR dashboard.</p>
+    """
+)
+
+templates.register(
+    'employee_notification',
+    subject="Important HR Update: $action_type",
+    text="""
+        Dear Employee,
+
+        This is to inform you about the following HR action:
+
+        $details
+
+        If you have any questions, please contact HR immediately.
+
+        Time: $time
+    """,
+    html_body="""
+        <p>Dear Employee,</p>
+        <p>This is to inform you about the following HR action:</p>
+        <p>$details</p>
+        <p>If you have any questions, please contact HR immediately.</p>
+        <p><strong>Time:</strong> $time</p>
+    """
+)
+
+templates.register(
+    'access_change',
+    subject="Access Control Update: $access_type",
+    text="""
+        Access Update Information:
+
+        Type: $access_type
+        Status: $status
+        Reason: $reason
+        Time: $time
+
+        If this change was not expected, please contact HR immediately.
+    """,
+    html_body="""
+        <p>Access Update Information:</p>
+        <ul>
+            <li><strong>Type:</strong> $access_type</li>
+            <li><strong>Status:</strong> $status</li>
+            <li><strong>Reason:</strong> $reason</li>
+            <li><strong>Time:</strong> $time</li>
+        </ul>
+        <p>If this change was not expected, please contact HR immediately.</p>
+    """
+)
+
+templates.register(
+    'performance_review_scheduled',
+    subject="Upcoming Performance Review",
+    text="""
+        Dear Employee,
+
+        Your performance review has been scheduled:
+
+        Date: $review_date
+        Reviewer: $reviewer
+
+        Please prepare necessary documentation and self-assessment.
+    """,
+    html_body="""
+        <p>Dear Employee,</p>
+        <p>Your performance review has been scheduled:</p>
+        <ul>
+            <li><strong>Date:</strong> $review_date</li>
+            <li><strong>Reviewer:</strong> $reviewer</li>
+        </ul>
+        <p>Please prepare necessary documentation and self-assessment.</p>
+    """
+)
+
+templates.register(
+    'decision_made',
+    subject="HR Decision Notification: $decision_type",
+    text="""
+        Dear Employee,
+
+        A decision has been made regarding: $decision_type
+
+        Decision: $decision
+        Details: $details
+
+        If you have any questions, please contact HR.
+    """,
+    html_body="""
+        <p>Dear Employee,</p>
+        <p>A decision has been made regarding: $decision_type</p>
+        <p><strong>Decision:</strong> $decision</p>
+        <pre>$details</pre>
+        <p>If you have any questions, please contact HR.</p>
+    """
+)
+
+templates.register(
+    'hr_digest',
+    subject="HR Action Digest: $count alerts",
+    text="""
+        The following HR actions were recorded since the last digest:
+
+        $summary
+
+        Time: $time
+
+        Please review these actions in the HR dashboard.
+    """,
+    html_body="""
+        <p>The following HR actions were recorded since the last digest:</p>
+        <pre>$summary</pre>
+        <p><strong>Time:</strong> $time</p>
+        <p>Please review these actions in the HR dashboard.</p>
+    """
+)
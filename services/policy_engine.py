@@ -0,0 +1,193 @@
+import json
+import logging
+import operator
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - YAML policies are optional
+    yaml = None
+
+OPERATORS = {
+    '>=': operator.ge,
+    '>': operator.gt,
+    '<=': operator.le,
+    '<': operator.lt,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+# Loads one fact for many employees: employee ids -> {employee_id: value}
+FactLoader = Callable[[List[int]], Dict[int, Any]]
+
+
+class PolicyError(ValueError):
+    """Raised when a policy definition cannot be compiled"""
+
+
+def _compile_check(rule: Dict, where: str) -> Callable[[Any], bool]:
+    op = OPERATORS.get(rule.get('op'))
+    if op is None:
+        raise PolicyError(f"{where}: unknown operator {rule.get('op')!r}")
+    if 'value' not in rule:
+        raise PolicyError(f"{where}: missing value")
+    value = rule['value']
+
+    # A fact that could not be determined never satisfies a rule
+    def check(fact, _op=op, _value=value):
+        return fact is not None and _op(fact, _value)
+    return check
+
+
+class CompiledPolicy:
+    """
+    Evaluation plan built once from a policy definition.
+
+    Each decision type compiles to an ordered tuple of (fact, check,
+    message) steps, and ``facts`` lists everything the plan reads so
+    callers can fetch it for many employees up front.
+    """
+
+    def __init__(self, definition: Dict, known_facts: Iterable[str]):
+        known_facts = set(known_facts)
+        self.version = definition.get('version')
+
+        scoring = definition.get('scoring') or {}
+        self.weights: Tuple[Tuple[str, float], ...] = tuple(
+            (metric, float(weight)) for metric, weight in (scoring.get('weights') or {}).items()
+        )
+        outcomes = []
+        for index, rule in enumerate(scoring.get('outcomes') or []):
+            where = f"scoring outcome {index}"
+            if not rule.get('outcome'):
+                raise PolicyError(f"{where}: missing outcome")
+            outcomes.append((_compile_check(rule, where), rule['outcome']))
+        self.outcomes = tuple(outcomes)
+        self.default_outcome = scoring.get('default', 'satisfactory')
+
+        self.decisions: Dict[str, Tuple[Tuple[str, Callable[[Any], bool], str], ...]] = {}
+        self.facts: Dict[str, FrozenSet[str]] = {}
+        for decision_type, rules in (definition.get('decisions') or {}).items():
+            steps = []
+            for index, rule in enumerate(rules):
+                where = f"{decision_type} rule {index}"
+                fact = rule.get('fact')
+                if fact not in known_facts:
+                    raise PolicyError(f"{where}: unknown fact {fact!r}")
+                steps.append((fact, _compile_check(rule, where),
+                              rule.get('message', f"{fact} requirement not met")))
+            self.decisions[decision_type] = tuple(steps)
+            self.facts[decision_type] = frozenset(step[0] for step in steps)
+
+    def score(self, metrics: Callable[[str], float]) -> Tuple[str, float]:
+        """Weighted score and outcome; ``metrics`` returns a metric's value by name"""
+        total_score = sum(metrics(metric) * weight for metric, weight in self.weights)
+        for check, outcome in self.outcomes:
+            if check(total_score):
+                return outcome, total_score
+        return self.default_outcome, total_score
+
+    def evaluate(self, decision_type: str, facts: Dict[str, Any]) -> Tuple[bool, str]:
+        for fact, check, message in self.decisions.get(decision_type, ()):
+            if not check(facts.get(fact)):
+                return False, message
+        return True, "Decision criteria met"
+
+    def evaluate_many(self, decision_type: str,
+                      facts_by_employee: Dict[int, Dict[str, Any]]) -> Dict[int, Tuple[bool, str]]:
+        steps = self.decisions.get(decision_type, ())
+        results = {}
+        for employee_id, facts in facts_by_employee.items():
+            for fact, check, message in steps:
+                if not check(facts.get(fact)):
+                    results[employee_id] = (False, message)
+                    break
+            else:
+                results[employee_id] = (True, "Decision criteria met")
+        return results
+
+
+class PolicyEngine:
+    """
+    Loads a JSON or YAML policy file and keeps its compiled plan current.
+
+    The file's modification time is checked at most every
+    ``reload_interval`` seconds; a changed file is recompiled and swapped
+    in without restarting the worker. A file that fails to compile is
+    logged and the previous plan stays in force.
+    """
+
+    def __init__(self, path: str, fact_loaders: Dict[str, FactLoader],
+                 reload_interval: float = 5.0):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.fact_loaders = fact_loaders
+        self.reload_interval = reload_interval
+        self._policy: Optional[CompiledPolicy] = None
+        self._mtime: Optional[float] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def policy(self) -> CompiledPolicy:
+        now = time.monotonic()
+        if self._policy is None or now - self._checked >= self.reload_interval:
+            self._maybe_reload(now)
+        return self._policy
+
+    def reload(self) -> CompiledPolicy:
+        """Compile the policy file now, raising PolicyError if it is invalid"""
+        with self._lock:
+            mtime = os.stat(self.path).st_mtime
+            self._policy = CompiledPolicy(self._read(), self.fact_loaders)
+            self._mtime = mtime
+            self._checked = time.monotonic()
+            self.logger.info(f"Loaded decision policy {self.path} (version {self._policy.version})")
+            return self._policy
+
+    def _maybe_reload(self, now: float) -> None:
+        with self._lock:
+            if self._policy is not None and now - self._checked < self.reload_interval:
+                return
+            self._checked = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+                if self._policy is not None and mtime == self._mtime:
+                    return
+                policy = CompiledPolicy(self._read(), self.fact_loaders)
+            except Exception as e:
+                if self._policy is None:
+                    raise
+                self.logger.error(f"Keeping previous decision policy, reload failed: {str(e)}")
+                return
+            self._policy, self._mtime = policy, mtime
+            self.logger.info(f"Loaded decision policy {self.path} (version {policy.version})")
+
+    def _read(self) -> Dict:
+        with open(self.path, encoding='utf-8') as policy_file:
+            if self.path.endswith(('.yml', '.yaml')):
+                if yaml is None:
+                    raise PolicyError("PyYAML is required for YAML policy files")
+                return yaml.safe_load(policy_file)
+            return json.load(policy_file)
+
+    def fetch_facts(self, decision_type: str, employee_ids: List[int],
+                    policy: Optional[CompiledPolicy] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Batch-load every fact the decision type's rules read, one query per fact
+        """
+        policy = policy or self.policy
+        facts_by_employee = {employee_id: {} for employee_id in employee_ids}
+        for fact in policy.facts.get(decision_type, ()):
+            for employee_id, value in self.fact_loaders[fact](employee_ids).items():
+                facts_by_employee[employee_id][fact] = value
+        return facts_by_employee
+
+    def validate_many(self, decision_type: str,
+                      employee_ids: List[int]) -> Dict[int, Tuple[bool, str]]:
+        policy = self.policy
+        return policy.evaluate_many(decision_type,
+                                    self.fetch_facts(decision_type, employee_ids, policy))
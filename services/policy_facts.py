@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import func
+
+from models.models import Employee, DecisionLog, PerformanceReview, db
+
+
+def _decision_count(decision_type: str):
+    def load(employee_ids: List[int]) -> Dict[int, Any]:
+        counts = {employee_id: 0 for employee_id in employee_ids}
+        rows = db.session.query(
+            DecisionLog.employee_id, func.count(DecisionLog.id)
+        ).filter(
+            DecisionLog.employee_id.in_(employee_ids),
+            DecisionLog.decision_type == decision_type
+        ).group_by(DecisionLog.employee_id).all()
+        counts.update(dict(rows))
+        return counts
+    return load
+
+
+def days_since_last_review(employee_ids: List[int]) -> Dict[int, Any]:
+    now = datetime.now()
+    rows = db.session.query(
+        PerformanceReview.employee_id, func.max(PerformanceReview.review_date)
+    ).filter(
+        PerformanceReview.employee_id.in_(employee_ids)
+    ).group_by(PerformanceReview.employee_id).all()
+    return {employee_id: (now - latest).days for employee_id, latest in rows}
+
+
+def tenure_years(employee_ids: List[int]) -> Dict[int, Any]:
+    now = datetime.now()
+    rows = db.session.query(Employee.id, Employee.hire_date).filter(
+        Employee.id.in_(employee_ids)
+    ).all()
+    return {employee_id: (now - hire_date).days / 365.25 for employee_id, hire_date in rows}
+
+
+# Facts a policy rule may reference, each loaded for many employees per query
+FACT_LOADERS = {
+    'documented_issue_count': _decision_count('performance_improvement_needed'),
+    'high_performance_count': _decision_count('promotion_recommended'),
+    'days_since_last_review': days_since_last_review,
+    'tenure_years': tenure_years
+}
@@ -0,0 +1,299 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from functools import wraps
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import Response, current_app, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config.config import Config
+from services.audit_writer import audit_writer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional codec
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional format
+    msgpack = None
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional shared backend
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Type is not serializable: {type(value).__name__}")
+
+
+def encode_json(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_default, separators=(',', ':')).encode()
+
+
+def encode_msgpack(data) -> bytes:
+    return msgpack.packb(data, default=_default, use_bin_type=True)
+
+
+class TableVersions:
+    """
+    Per-table version counters bumped on every committed write.
+
+    Counters live in Redis when a ``redis://`` URL is configured, so every
+    app instance sees the same versions. Otherwise they are kept in
+    process, together with a random epoch so ETags issued before a restart
+    never match again. Per-process counters cannot see writes made by
+    other instances, so ``init_app`` turns ETags off when several
+    instances run without a shared backend.
+
+    If Redis cannot be reached, ``get`` returns None (no ETag) until it is
+    back. Writes made meanwhile were not counted, so reconnecting bumps a
+    shared epoch counter that retires every ETag issued before the outage.
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: str = 'hr_automation:table_version:',
+                 retry_interval: float = 5.0):
+        self.prefix = prefix
+        self.retry_interval = retry_interval
+        self._local: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._retry_at: Optional[float] = None
+        self.epoch = uuid.uuid4().hex
+        self.etags_enabled = True
+        if url:
+            self.configure(url)
+
+    def init_app(self, app) -> None:
+        """
+        Use RESPONSE_VERSION_URL, or the Redis Socket.IO message queue, as the shared backend
+        """
+        url = app.config.get('RESPONSE_VERSION_URL', Config.RESPONSE_VERSION_URL)
+        message_queue = app.config.get('SOCKETIO_MESSAGE_QUEUE')
+        if not url and message_queue and message_queue.startswith(('redis://', 'rediss://')):
+            url = message_queue
+        self.configure(url)
+
+        instances = app.config.get('APP_INSTANCES', Config.APP_INSTANCES)
+        self.etags_enabled = self.shared or instances <= 1
+        if not self.etags_enabled:
+            logger.warning(f"{instances} app instances without a shared version backend; "
+                           f"ETags are disabled")
+
+    @property
+    def shared(self) -> bool:
+        return self._redis is not None
+
+    def configure(self, url: Optional[str]) -> None:
+        self._retry_at = None
+        if not url:
+            self._redis = None
+            self.epoch = uuid.uuid4().hex
+            return
+        if redis is None:
+            logger.warning("redis is not installed; table versions stay per process")
+            return
+        self._redis = redis.Redis.from_url(url)
+        self.epoch = ''
+
+    def bump(self, tables: Iterable[str]) -> None:
+        tables = set(tables)
+        if not tables:
+            return
+        if self._redis is not None:
+            if not self._available():
+                return
+            pipe = self._redis.pipeline(transaction=False)
+            for table in tables:
+                pipe.incr(self.prefix + table)
+            try:
+                pipe.execute()
+            except redis.RedisError as e:
+                self._unavailable(e)
+            return
+        with self._lock:
+            for table in tables:
+                self._local[table] = self._local.get(table, 0) + 1
+
+    def get(self, tables: Tuple[str, ...]) -> Optional[Tuple[int, ...]]:
+        """Current versions of ``tables``, or None while they cannot be trusted"""
+        if self._redis is not None:
+            if not self._available():
+                return None
+            try:
+                values = self._redis.mget([self.prefix + '$epoch'] +
+                                          [self.prefix + table for table in tables])
+            except redis.RedisError as e:
+                self._unavailable(e)
+                return None
+            return tuple(int(value or 0) for value in values)
+        with self._lock:
+            return tuple(self._local.get(table, 0) for table in tables)
+
+    def _unavailable(self, error: Exception) -> None:
+        if self._retry_at is None:
+            logger.error(f"Table versions unavailable, serving without ETags: {str(error)}")
+        self._retry_at = time.monotonic() + self.retry_interval
+
+    def _available(self) -> bool:
+        if self._retry_at is None:
+            return True
+        if time.monotonic() < self._retry_at:
+            return False
+        try:
+            self._redis.incr(self.prefix + '$epoch')
+        except redis.RedisError as e:
+            self._unavailable(e)
+            return False
+        self._retry_at = None
+        logger.info("Table versions reachable again")
+        return True
+
+
+table_versions = TableVersions(Config.RESPONSE_VERSION_URL)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_written_tables(session, flush_context):
+    written = session.info.setdefault('written_tables', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table:
+            written.add(table)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_statement_tables(orm_execute_state):
+    # ORM update()/delete()/insert() statements bypass the unit of work
+    if orm_execute_state.is_update or orm_execute_state.is_delete or \
+            orm_execute_state.is_insert:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            orm_execute_state.session.info.setdefault('written_tables', set()).add(
+                mapper.local_table.name
+            )
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_written_tables(session):
+    written = session.info.pop('written_tables', None)
+    if written:
+        # The write has landed; a version failure must not fail the request
+        try:
+            table_versions.bump(written)
+        except Exception as e:
+            logger.error(f"Failed to bump table versions: {str(e)}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_written_tables(session):
+    session.info.pop('written_tables', None)
+
+
+# Bulk inserts bypass the session's object tracking
+audit_writer.add_flush_listener(lambda rows: table_versions.bump(['decision_logs']))
+
+
+def _negotiate_format() -> str:
+    if msgpack is not None and request.accept_mimetypes.best_match(
+            ['application/json', MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE:
+        return 'msgpack'
+    return 'json'
+
+
+def _compress(body: bytes) -> Tuple[bytes, Optional[str]]:
+    min_size = current_app.config.get('RESPONSE_COMPRESS_MIN_SIZE',
+                                      Config.RESPONSE_COMPRESS_MIN_SIZE)
+    if len(body) < min_size:
+        return body, None
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return brotli.compress(body, quality=4), 'br'
+    if accepted['gzip']:
+        return gzip.compress(body, compresslevel=5), 'gzip'
+    return body, None
+
+
+def encode_response(data, status: int = 200, fmt: str = 'json') -> Response:
+    """
+    Serialize data compactly, compressing it when the client allows
+    """
+    if fmt == 'msgpack':
+        body, mimetype = encode_msgpack(data), MSGPACK_MIMETYPE
+    else:
+        body, mimetype = encode_json(data), 'application/json'
+
+    body, encoding = _compress(body)
+    response = Response(body, status=status, mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
+
+
+def cached_response(*tables: str):
+    """
+    Serve a read endpoint with ETags derived from table versions
+
+    The decorated view returns ``(data, status)``. A request whose
+    If-None-Match matches the current versions of ``tables`` is answered
+    with 304 before the view, and the database, are touched. Responses the
+    view builds itself (e.g. errors) pass through unchanged. When table
+    versions are not shared between instances, or cannot be read,
+    responses carry no ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            fmt = _negotiate_format()
+            versions = table_versions.get(tables) if table_versions.etags_enabled else None
+            if versions is None:
+                rv = view(*args, **kwargs)
+                data, status = rv if isinstance(rv, tuple) else (rv, 200)
+                return rv if isinstance(data, Response) else encode_response(data, status, fmt)
+
+            digest = hashlib.blake2b(
+                repr((table_versions.epoch, versions, request.full_path, fmt)).encode(),
+                digest_size=12
+            ).hexdigest()
+
+            if request.if_none_match.contains_weak(digest):
+                response = Response(status=304)
+                response.set_etag(digest, weak=True)
+                response.vary.update(('Accept', 'Accept-Encoding'))
+                return response
+
+            rv = view(*args, **kwargs)
+            data, status = rv if isinstance(rv, tuple) else (rv, 200)
+            if isinstance(data, Response):
+                return rv
+
+            response = encode_response(data, status, fmt)
+            if status == 200:
+                response.set_etag(digest, weak=True)
+                response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,66 @@
+import queue
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import socketio
+
+
+class InMemoryManager(socketio.PubSubManager):
+    """
+    Socket.IO pub/sub manager backed by in-process queues.
+
+    Behaves like the Redis manager for every server created in the same
+    process, which lets tests and local runs exercise the cross-worker
+    broadcast path without a broker. It cannot reach other processes; use
+    a ``redis://`` or ``amqp://`` queue for that.
+    """
+    name = 'memory'
+
+    _subscribers: Dict[str, List[queue.Queue]] = defaultdict(list)
+    _subscribers_lock = threading.Lock()
+
+    def __init__(self, channel: str = 'socketio', write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self._queue: Optional[queue.Queue] = None
+        if not write_only:
+            self._queue = queue.Queue()
+            with self._subscribers_lock:
+                self._subscribers[channel].append(self._queue)
+
+    def _publish(self, data):
+        # Encoded like the Redis manager's messages; the listener thread
+        # only decodes JSON and drops anything else
+        message = self.json.dumps(data)
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers[self.channel])
+        for subscriber in subscribers:
+            subscriber.put(message)
+
+    def _listen(self):
+        while True:
+            yield self._queue.get()
+
+
+def socketio_options(message_queue: Optional[str], channel: str = 'hr_automation',
+                     connect_timeout: Optional[float] = None) -> Dict:
+    """
+    Build the Flask-SocketIO init_app arguments for a message queue URL
+
+    ``memory://`` selects the in-process broker. Redis URLs get a manager
+    whose connections give up after ``connect_timeout``, so an unreachable
+    broker cannot pin a dispatcher thread; reads keep no timeout because
+    the subscriber legitimately blocks between messages. Any other URL is
+    handed to Flask-SocketIO, which picks the Kombu manager from its
+    scheme. Without a URL sockets stay local to the process.
+    """
+    if not message_queue:
+        return {}
+    if message_queue.startswith('memory://'):
+        return {'client_manager': InMemoryManager(channel=channel)}
+    if message_queue.startswith(('redis://', 'rediss://')) and connect_timeout:
+        return {'client_manager': socketio.RedisManager(
+            message_queue, channel=channel,
+            redis_options={'socket_connect_timeout': connect_timeout}
+        )}
+    return {'message_queue': message_queue, 'channel': channel}
@@ -0,0 +1,205 @@
+import base64
+import bisect
+import heapq
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from models.models import DecisionLog
+from config.config import Config
+from services.audit_writer import audit_writer
+from services.response_cache import table_versions
+
+# Sort key of a timeline entry: (timestamp, kind, row id)
+EntryKey = Tuple[str, str, int]
+
+TIMELINE_TABLES = ('decision_logs',)
+
+# DecisionLog.decision_category values, each cached as its own timeline
+KINDS = ('access', 'review', 'decision')
+
+
+def encode_cursor(key: EntryKey) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> EntryKey:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, kind, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (str(timestamp), str(kind), int(row_id))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid timeline cursor")
+
+
+class _Timeline:
+    __slots__ = ('keys', 'entries', 'ids', 'last_log_id', 'watermark', 'refreshed', 'versions',
+                 'stale', 'lock')
+
+    def __init__(self):
+        self.keys: List[EntryKey] = []
+        self.entries: List[Dict] = []
+        self.ids: Set[int] = set()
+        self.last_log_id = 0
+        self.watermark: Optional[datetime] = None
+        self.refreshed = 0.0
+        self.versions = None
+        self.stale = True
+        self.lock = threading.Lock()
+
+    def insert(self, key: EntryKey, entry: Dict) -> None:
+        self.ids.add(entry['id'])
+        index = bisect.bisect(self.keys, key)
+        self.keys.insert(index, key)
+        self.entries.insert(index, entry)
+
+    def newest(self, before: Optional[EntryKey] = None,
+               limit: Optional[int] = None) -> List[Tuple[EntryKey, Dict]]:
+        """Entries sorted before ``before``, newest first; caller holds the lock"""
+        end = bisect.bisect_left(self.keys, before) if before else len(self.keys)
+        start = 0 if limit is None else max(end - limit, 0)
+        return list(zip(reversed(self.keys[start:end]), reversed(self.entries[start:end])))
+
+
+class TimelineService:
+    """
+    Per-employee timeline of access changes, reviews and decisions.
+
+    Timelines are built from DecisionLog alone (a performance review is
+    logged there as a ``review`` entry) and cached per employee and
+    decision category, so each refresh reads one range of the
+    (employee_id, decision_category, id) index; pages that span several
+    kinds merge the cached lists. A refresh fetches rows with an id above
+    the last one seen. Ids are allocated before commit, so a row can
+    become visible after a higher id was already read; each refresh also
+    scans the ids of rows created since the previous refresh, less
+    TIMELINE_LATE_ROW_GRACE, and loads any it has not seen. A row whose
+    transaction stays open longer than the grace period is only picked up
+    once the timeline is invalidated or evicted.
+
+    A timeline is refreshed when the audit writer in this process flushes
+    rows for the employee, when the shared table versions change, or at
+    the latest after TIMELINE_REFRESH_INTERVAL.
+    """
+
+    def __init__(self, max_employees: int = Config.TIMELINE_CACHE_SIZE,
+                 refresh_interval: float = Config.TIMELINE_REFRESH_INTERVAL,
+                 late_row_grace: float = Config.TIMELINE_LATE_ROW_GRACE):
+        self.logger = logging.getLogger(__name__)
+        self.max_employees = max_employees
+        self.refresh_interval = refresh_interval
+        self.late_row_grace = timedelta(seconds=late_row_grace)
+        self._timelines: 'OrderedDict[Tuple[int, str], _Timeline]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_timeline(self, employee_id: int, limit: int = 50, cursor: Optional[str] = None,
+                     kinds: Optional[Set[str]] = None) -> Dict:
+        """
+        Return one page of an employee's timeline, newest first
+
+        ``cursor`` is the ``next_cursor`` of the previous page. Raises
+        ValueError for a malformed cursor.
+        """
+        before = decode_cursor(cursor) if cursor else None
+        page = list(islice(self._merged(employee_id, kinds, before, limit + 1), limit + 1))
+
+        items = [entry for _, entry in page[:limit]]
+        next_cursor = encode_cursor(page[limit - 1][0]) if len(page) > limit else None
+        return {'items': items, 'next_cursor': next_cursor}
+
+    def iter_entries(self, employee_id: int, kinds: Optional[Set[str]] = None) -> List[Dict]:
+        """Every cached entry for an employee, newest first"""
+        return [entry for _, entry in self._merged(employee_id, kinds)]
+
+    def mark_stale(self, rows: Iterable[Dict]) -> None:
+        """Flag timelines of employees with newly written DecisionLog rows"""
+        with self._lock:
+            for row in rows:
+                for kind in KINDS:
+                    timeline = self._timelines.get((row.get('employee_id'), kind))
+                    if timeline is not None:
+                        timeline.stale = True
+
+    def invalidate(self, employee_id: int) -> None:
+        """Drop an employee's cached timeline, e.g. after a row was updated in place"""
+        with self._lock:
+            for kind in KINDS:
+                self._timelines.pop((employee_id, kind), None)
+
+    def _merged(self, employee_id: int, kinds: Optional[Set[str]],
+                before: Optional[EntryKey] = None, limit: Optional[int] = None):
+        """Newest-first (key, entry) pairs across the requested kinds"""
+        streams = []
+        for kind in KINDS:
+            if kinds is None or kind in kinds:
+                timeline = self._refresh(employee_id, kind)
+                with timeline.lock:
+                    streams.append(timeline.newest(before, limit))
+        return heapq.merge(*streams, key=lambda pair: pair[0], reverse=True)
+
+    def _timeline(self, employee_id: int, kind: str) -> _Timeline:
+        with self._lock:
+            timeline = self._timelines.get((employee_id, kind))
+            if timeline is None:
+                timeline = self._timelines[(employee_id, kind)] = _Timeline()
+                if len(self._timelines) > self.max_employees * len(KINDS):
+                    self._timelines.popitem(last=False)
+            else:
+                self._timelines.move_to_end((employee_id, kind))
+            return timeline
+
+    @staticmethod
+    def _add(timeline: _Timeline, log: DecisionLog) -> None:
+        entry = {
+            'kind': log.decision_category,
+            'id': log.id,
+            'timestamp': log.created_at.isoformat(),
+            'type': log.decision_type,
+            'access_type': log.access_type,
+            'details': log.decision_data,
+            'automated': log.automated_decision,
+            'hr_review_status': log.hr_review_status
+        }
+        timeline.insert((entry['timestamp'], entry['kind'], log.id), entry)
+
+    def _refresh(self, employee_id: int, kind: str) -> _Timeline:
+        timeline = self._timeline(employee_id, kind)
+        with timeline.lock:
+            now = time.monotonic()
+            versions = table_versions.get(TIMELINE_TABLES)
+            if not timeline.stale and versions == timeline.versions and \
+                    now - timeline.refreshed < self.refresh_interval:
+                return timeline
+            timeline.stale = False
+            timeline.refreshed = now
+            timeline.versions = versions
+            previous, timeline.watermark = timeline.watermark, datetime.utcnow()
+
+            rows = DecisionLog.query.filter(
+                DecisionLog.employee_id == employee_id,
+                DecisionLog.decision_category == kind
+            )
+            for log in rows.filter(DecisionLog.id > timeline.last_log_id).order_by(DecisionLog.id):
+                self._add(timeline, log)
+                timeline.last_log_id = log.id
+
+            if previous is not None:
+                missing = [row_id for (row_id,) in rows.with_entities(DecisionLog.id).filter(
+                    DecisionLog.id <= timeline.last_log_id,
+                    DecisionLog.created_at >= previous - self.late_row_grace
+                ) if row_id not in timeline.ids]
+                if missing:
+                    self.logger.debug(f"Filling {len(missing)} late timeline rows for employee {employee_id}")
+                    for log in DecisionLog.query.filter(DecisionLog.id.in_(missing)):
+                        self._add(timeline, log)
+
+        return timeline
+
+
+timeline_service = TimelineService()
+audit_writer.add_flush_listener(timeline_service.mark_stale)
@@ -0,0 +1,31 @@
+import pytest
+from flask import Flask
+from flask_mail import Mail
+
+from models.models import Employee, db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'hr.db'}",
+        AUDIT_WAL_PATH=str(tmp_path / 'audit.wal'),
+        AUDIT_DEAD_LETTER_PATH=str(tmp_path / 'audit.deadletter'),
+        AUDIT_WAL_FSYNC=False,
+        AUDIT_FLUSH_INTERVAL=3600,
+        MAIL_SUPPRESS_SEND=True,
+        MAIL_DEFAULT_SENDER='hr@example.com',
+        HR_NOTIFICATION_EMAILS=['hr@example.com'],
+        NOTIFICATION_DIGEST_ENABLED=False
+    )
+    db.init_app(app)
+    Mail(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Employee(id=1, email='ada@example.com', password_hash='x',
+                                first_name='Ada', last_name='Lovelace', department='IT',
+                                role='Engineer'))
+        db.session.commit()
+        yield app
+        db.session.remove()
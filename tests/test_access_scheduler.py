@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import OperationalError
+
+from controllers.access_manager import AccessManager
+from controllers.hr_controller import hr_controller
+from models.models import AccessControl, db
+from services.access_scheduler import GRANT, NOTICE, REVOKE, AccessScheduler
+from services.audit_writer import audit_writer
+
+
+class RecordingNotifications:
+    def __init__(self):
+        self.sent = []
+
+    def notify_employee(self, email, action_type, details):
+        self.sent.append((email, action_type))
+
+    def notify_hr_personnel(self, action_type, details):
+        pass
+
+
+class RecordingAccessManager:
+    def __init__(self, error=None):
+        self.notification_service = RecordingNotifications()
+        self.error = error
+        self.calls = []
+
+    def apply_scheduled_changes(self, records, action, reason):
+        self.calls.append(([record.id for record in records], action))
+        if self.error:
+            raise self.error
+        return []
+
+
+def _scheduler(app, access_manager):
+    scheduler = AccessScheduler(app)
+    scheduler.access_manager = access_manager
+    scheduler._leading = True
+    return scheduler
+
+
+def _pending_record(start_date):
+    record = AccessControl(employee_id=1, access_type='building', access_level='full',
+                           start_date=start_date, status='pending', modified_by=1)
+    db.session.add(record)
+    db.session.commit()
+    return record
+
+
+def test_committed_record_is_scheduled(app):
+    scheduler = _scheduler(app, RecordingAccessManager())
+    start = datetime.utcnow() + timedelta(days=7)
+    _pending_record(start)
+    assert scheduler.next_due() == start - scheduler.notice_period
+
+
+def test_sent_notice_is_not_repeated_after_restart(app):
+    access_manager = RecordingAccessManager()
+    scheduler = _scheduler(app, access_manager)
+    _pending_record(datetime.utcnow() + timedelta(hours=1))
+
+    assert scheduler.process_due()[NOTICE] == 1
+    scheduler.load()
+    assert scheduler.process_due()[NOTICE] == 0
+    assert len(access_manager.notification_service.sent) == 1
+
+
+def test_failed_transition_is_retried_with_backoff(app):
+    access_manager = RecordingAccessManager(error=OperationalError('UPDATE', {}, Exception('down')))
+    scheduler = _scheduler(app, access_manager)
+    record = _pending_record(datetime.utcnow() - timedelta(minutes=1))
+    record_id = record.id
+
+    scheduler.process_due()
+    assert access_manager.calls == [([record_id], GRANT)]
+    retry_at = scheduler.next_due()
+    assert retry_at > datetime.utcnow() + timedelta(seconds=scheduler.retry_base - 5)
+
+    scheduler.process_due(now=retry_at)
+    assert len(access_manager.calls) == 2
+    assert scheduler.next_due() > datetime.utcnow() + timedelta(seconds=scheduler.retry_base * 2 - 5)
+
+
+def test_future_start_date_waits_for_scheduled_grant(app):
+    scheduler = _scheduler(app, RecordingAccessManager())
+    start = datetime.utcnow() + timedelta(days=2)
+    record = AccessControl(employee_id=1, access_type='system', access_level='full',
+                           start_date=start, modified_by=1)
+    db.session.add(record)
+    db.session.commit()
+
+    assert record.status == 'pending'
+    assert (record.id, GRANT, start) in {(e[2], e[3], e[4]) for e in scheduler._heap}
+
+
+def test_scheduled_revocation_changes_access_etag(app):
+    audit_writer.init_app(app)
+    app.register_blueprint(hr_controller)
+    client = app.test_client()
+    scheduler = _scheduler(app, AccessManager())
+
+    end_date = datetime.utcnow() - timedelta(minutes=1)
+    record = AccessControl(employee_id=1, access_type='building', access_level='full',
+                           start_date=datetime.utcnow() - timedelta(days=30),
+                           end_date=end_date, notice_sent_for=end_date, modified_by=1)
+    db.session.add(record)
+    db.session.commit()
+    record_id = record.id
+    etag = client.get('/api/employees/1/access').headers['ETag']
+    assert client.get('/api/employees/1/access',
+                      headers={'If-None-Match': etag}).status_code == 304
+
+    assert scheduler.process_due()[REVOKE] == 1
+
+    assert db.session.get(AccessControl, record_id).status == 'expired'
+    response = client.get('/api/employees/1/access', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    audit_writer.close()
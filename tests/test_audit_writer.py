@@ -0,0 +1,113 @@
+import glob
+import json
+
+from sqlalchemy.exc import OperationalError
+
+from models.models import DecisionLog, db
+from services.audit_writer import AuditWriter
+
+
+def _decision(**overrides):
+    fields = dict(employee_id=1, decision_type='revoke_system_access',
+                  decision_data={'action': 'revoke', 'reason': 'offboarding'},
+                  automated_decision=False)
+    fields.update(overrides)
+    return DecisionLog(**fields)
+
+
+def _crash(writer):
+    """Abandon a writer the way a killed process would: nothing flushed or closed"""
+    writer._stopping.set()
+    writer._wal.close()
+
+
+def test_wal_records_are_replayed_after_crash(app):
+    writer = AuditWriter(app)
+    writer.add(_decision())
+    writer.add(_decision(decision_type='grant_building_access', access_type='building'))
+    assert DecisionLog.query.count() == 0
+    _crash(writer)
+
+    recovered = AuditWriter(app)
+    recovered.flush()
+    assert recovered.metrics()['rows_flushed'] == 2
+
+    logs = DecisionLog.query.order_by(DecisionLog.id).all()
+    assert [log.decision_type for log in logs] == ['revoke_system_access', 'grant_building_access']
+    assert logs[0].decision_category == 'access'
+    assert logs[0].access_type == 'system'
+    assert glob.glob(f"{recovered.wal_path}.*.*") == []
+    recovered.close()
+
+
+def test_staged_rows_follow_the_transaction(app):
+    writer = AuditWriter(app)
+
+    writer.stage(_decision(decision_type='rolled_back'))
+    db.session.rollback()
+    writer.stage(_decision(decision_type='committed'))
+    db.session.commit()
+    _crash(writer)
+
+    recovered = AuditWriter(app)
+    recovered.flush()
+    assert [log.decision_type for log in DecisionLog.query.all()] == ['committed']
+    recovered.close()
+
+
+def test_rejected_row_is_dead_lettered(app):
+    writer = AuditWriter(app)
+    writer.add(_decision())
+    writer.add(_decision(employee_id=None))
+    writer.add(_decision(decision_type='grant_system_access'))
+
+    assert writer.flush() == 2
+    assert DecisionLog.query.count() == 2
+    assert writer.metrics()['dead_lettered'] == 1
+    assert writer.metrics()['buffer_depth'] == 0
+
+    with open(writer.dead_letter_path, encoding='utf-8') as dead_letter:
+        entries = [json.loads(line) for line in dead_letter]
+    assert len(entries) == 1
+    assert 'employee_id' not in entries[0]['row']
+
+    writer.add(_decision())
+    assert writer.flush() == 1
+    writer.close()
+
+
+def test_write_through_row_is_stored_on_commit(app):
+    writer = AuditWriter(app)
+    writer.stage(_decision(), flush=True)
+    db.session.commit()
+    assert DecisionLog.query.count() == 1
+    writer.close()
+
+
+def test_close_drains_buffer_when_shutdown_budget_is_spent(app):
+    writer = AuditWriter(app)
+    writer.add(_decision())
+    writer.add(_decision(decision_type='grant_system_access'))
+    assert DecisionLog.query.count() == 0
+
+    writer.close(0)
+    assert DecisionLog.query.count() == 2
+    assert writer.metrics()['buffer_depth'] == 0
+    assert glob.glob(f"{writer.wal_path}.*.*") == []
+
+
+def test_sync_decision_survives_database_outage(app, monkeypatch):
+    writer = AuditWriter(app)
+
+    def unreachable(*args, **kwargs):
+        raise OperationalError('INSERT', {}, Exception('connection refused'))
+
+    with monkeypatch.context() as patch:
+        patch.setattr(db.session, 'bulk_insert_mappings', unreachable)
+        writer.add(_decision(decision_type='termination'))
+    assert writer.metrics()['flush_failures'] == 1
+    assert writer.metrics()['buffer_depth'] == 1
+
+    assert writer.flush() == 1
+    assert DecisionLog.query.filter_by(decision_type='termination').count() == 1
+    writer.close()
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import services.notification_service as notification_module
+from services.notification_digest import NotificationDigest
+from services.notification_service import NotificationService
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.batches = []
+        self.delivered = threading.Event()
+
+    def __call__(self, batches):
+        self.batches.append((time.monotonic(), batches))
+        self.delivered.set()
+
+
+class RecordingDispatcher:
+    def __init__(self):
+        self.deliveries = []
+
+    def dispatch(self, deliveries):
+        self.deliveries.extend(deliveries)
+        return [True] * len(deliveries)
+
+
+def _alert(email='ada@example.com', **details):
+    return dict({'employee_email': email, 'access_type': 'system', 'status': 'approved'},
+                **details)
+
+
+def test_digest_flushes_after_quiet_window(app):
+    app.config.update(NOTIFICATION_DIGEST_WINDOW=0.1, NOTIFICATION_DIGEST_MAX_DELAY=5)
+    handler = RecordingHandler()
+    digest = NotificationDigest(handler, window=60, max_delay=600)
+
+    started = time.monotonic()
+    digest.add(['hr@example.com'], 'access_request', _alert())
+    assert handler.delivered.wait(2)
+
+    flushed_at, batches = handler.batches[0]
+    assert 0.1 <= flushed_at - started < 1
+    assert list(batches) == ['hr@example.com']
+    assert digest.pending() == 0
+    digest.stop()
+
+
+def test_max_delay_caps_a_busy_buffer(app):
+    app.config.update(NOTIFICATION_DIGEST_WINDOW=0.3, NOTIFICATION_DIGEST_MAX_DELAY=0.5)
+    handler = RecordingHandler()
+    digest = NotificationDigest(handler, window=60, max_delay=600)
+
+    # Alerts keep arriving faster than the window, so only max_delay can flush
+    started = time.monotonic()
+    while time.monotonic() - started < 1.2:
+        digest.add(['hr@example.com'], 'access_request', _alert())
+        time.sleep(0.05)
+    digest.stop()
+
+    first_flush = handler.batches[0][0] - started
+    assert 0.5 <= first_flush < 0.9
+    assert len(handler.batches) >= 2
+
+
+def test_repeats_are_counted_per_employee_and_action(app):
+    handler = RecordingHandler()
+    digest = NotificationDigest(handler, window=60, max_delay=600)
+
+    for _ in range(3):
+        digest.add(['hr@example.com'], 'access_request', _alert())
+    digest.add(['hr@example.com'], 'access_request', _alert('grace@example.com'))
+    digest.add(['hr@example.com'], 'performance_review', _alert())
+    assert digest.pending() == 3
+
+    digest.flush()
+    alerts = handler.batches[0][1]['hr@example.com']
+    counts = {(alert.action_type, alert.details['employee_email']): alert.count
+              for alert in alerts}
+    assert counts == {('access_request', 'ada@example.com'): 3,
+                      ('access_request', 'grace@example.com'): 1,
+                      ('performance_review', 'ada@example.com'): 1}
+    digest.stop()
+
+
+def test_termination_bypasses_the_digest(app, monkeypatch):
+    app.config['NOTIFICATION_DIGEST_ENABLED'] = True
+    handler = RecordingHandler()
+    digest = NotificationDigest(handler, window=60, max_delay=600)
+    monkeypatch.setattr(notification_module, 'notification_digest', digest)
+    service = NotificationService(RecordingDispatcher())
+
+    deliveries = service.hr_alert_deliveries('decision_review', _alert(decision_type='termination'))
+    assert [delivery.channel for delivery in deliveries] == ['email', 'websocket']
+    assert digest.pending() == 0
+
+    assert service.hr_alert_deliveries('access_request', _alert()) == []
+    assert digest.pending() == 1
+    digest.stop()
+
+
+def test_digest_summary_names_scheduled_change(app):
+    dispatcher = RecordingDispatcher()
+    handler = RecordingHandler()
+    digest = NotificationDigest(handler, window=60, max_delay=600)
+    digest.add(['hr@example.com'], 'scheduled_access_change',
+               {'employee_email': 'ada@example.com', 'access_type': 'system',
+                'change': 'revoked', 'effective': '2026-01-01T00:00:00'})
+    digest.flush()
+
+    NotificationService(dispatcher).send_hr_digest(handler.batches[0][1])
+    email = dispatcher.deliveries[0]
+    assert email.channel == 'email'
+    assert '- scheduled_access_change: ada@example.com (revoked)' in email.args[1].body
+    digest.stop()
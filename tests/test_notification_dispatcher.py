@@ -0,0 +1,23 @@
+import threading
+import time
+
+from services.notification_dispatcher import Delivery, NotificationDispatcher
+
+
+def test_hung_channel_does_not_starve_other_channels():
+    dispatcher = NotificationDispatcher(limits={'email': 2, 'websocket': 4},
+                                        timeouts={'email': 0.2, 'websocket': 1.0})
+    release = threading.Event()
+    hung = Delivery('email', lambda: release.wait(5), ())
+    quick = Delivery('websocket', lambda: True, ())
+    try:
+        started = time.monotonic()
+        results = dispatcher.dispatch([hung] * 4 + [quick] * 4)
+        assert results == [False] * 4 + [True] * 4
+        assert time.monotonic() - started < 1.0
+
+        # Email threads are still blocked; websocket sends keep flowing
+        assert dispatcher.dispatch([quick] * 8) == [True] * 8
+    finally:
+        release.set()
+        dispatcher.shutdown()
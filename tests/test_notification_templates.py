@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+import services.notification_templates as notification_templates
+from services.notification_templates import TemplateRegistry, dumps_details
+
+
+def test_compiled_template_matches_placeholder_syntax():
+    registry = TemplateRegistry()
+    registry.register('t', subject="Cost: $$${amount} for $who",
+                      text="{literal} $details", html_body="<p>$who</p>")
+
+    rendered = registry.render('t', amount=5, who='<Ann>', details={'b': 1, 'a': None},
+                               unused='ignored')
+    assert rendered.subject == "Cost: $5 for <Ann>"
+    assert rendered.body == '{literal} {\n  "b": 1,\n  "a": null\n}\n'
+    assert rendered.html == "<p>&lt;Ann&gt;</p>"
+
+
+def test_identical_context_is_rendered_once():
+    registry = TemplateRegistry()
+    registry.register('t', subject="$a", text="$b")
+    first = registry.render('t', a='x', b={'k': 1})
+    assert registry.render('t', b={'k': 1}, a='x') is first
+    assert (registry.hits, registry.misses) == (1, 1)
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_details_match_plain_json_dumps(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(notification_templates, 'orjson', None)
+    elif notification_templates.orjson is None:
+        pytest.skip("orjson is not installed")
+    details = {'status': 'approved', 'employee': {'name': 'Ada', 'id': 1}, 'tags': ['a', 'b']}
+    assert dumps_details(details) == json.dumps(details, indent=2)
@@ -0,0 +1,150 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from config.config import Config
+from models.models import DecisionLog, Employee, PerformanceReview, db
+from services.decision_service import DecisionService
+from services.policy_engine import CompiledPolicy, PolicyEngine, PolicyError
+from services.policy_facts import FACT_LOADERS
+
+
+def _removed_branches(decision_type, employee_id):
+    """
+    The hard-coded checks DecisionService.validate_decision ran before the
+    policy file; Employee has no tenure_years, so tenure comes from hire_date
+    """
+    employee = db.session.get(Employee, employee_id)
+    if decision_type == "termination":
+        performance_issues = DecisionLog.query.filter_by(
+            employee_id=employee_id, decision_type="performance_improvement_needed"
+        ).count()
+        if performance_issues < 2:
+            return False, "Insufficient documentation for termination"
+        latest_review = PerformanceReview.query.filter_by(
+            employee_id=employee_id
+        ).order_by(PerformanceReview.review_date.desc()).first()
+        if not latest_review or (datetime.now() - latest_review.review_date).days > 90:
+            return False, "Recent performance review required"
+    elif decision_type == "promotion":
+        if (datetime.now() - employee.hire_date).days / 365.25 < 1:
+            return False, "Minimum tenure not met"
+        high_performance_count = DecisionLog.query.filter_by(
+            employee_id=employee_id, decision_type="promotion_recommended"
+        ).count()
+        if high_performance_count < 2:
+            return False, "Insufficient high performance records"
+    return True, "Decision criteria met"
+
+
+def _employee(employee_id, hired_days_ago=0, issues=0, promotions=0, reviewed_days_ago=None):
+    now = datetime.now()
+    db.session.add(Employee(id=employee_id, email=f'e{employee_id}@example.com', password_hash='x',
+                            first_name='E', last_name=str(employee_id), department='IT',
+                            role='Engineer', hire_date=now - timedelta(days=hired_days_ago)))
+    for decision_type, count in (('performance_improvement_needed', issues),
+                                 ('promotion_recommended', promotions)):
+        for _ in range(count):
+            db.session.add(DecisionLog(employee_id=employee_id, decision_type=decision_type,
+                                       decision_data={}, automated_decision=True))
+    if reviewed_days_ago is not None:
+        db.session.add(PerformanceReview(employee_id=employee_id, reviewer_id=1,
+                                         review_date=now - timedelta(days=reviewed_days_ago),
+                                         metrics={}, overall_score=3.0))
+    db.session.commit()
+    return employee_id
+
+
+@pytest.fixture
+def staff(app):
+    return [
+        _employee(10, issues=2, reviewed_days_ago=30),
+        _employee(11, issues=1, reviewed_days_ago=10),
+        _employee(12, issues=3, reviewed_days_ago=120),
+        _employee(13, issues=2),
+        _employee(14, hired_days_ago=800, promotions=2, reviewed_days_ago=5),
+        _employee(15, hired_days_ago=180, promotions=3),
+        _employee(16, hired_days_ago=1200, promotions=1)
+    ]
+
+
+def _write_policy(path, definition, mtime):
+    path.write_text(json.dumps(definition), encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.mark.parametrize('decision_type', ['termination', 'promotion'])
+def test_policy_matches_removed_branches(staff, decision_type):
+    results = DecisionService(None).validate_decisions(decision_type, staff)
+    expected = {employee_id: _removed_branches(decision_type, employee_id)
+                for employee_id in staff}
+    assert results == expected
+    assert len(set(expected.values())) == 3
+
+
+@pytest.mark.parametrize('rule, error', [
+    ({'fact': 'salary', 'op': '>=', 'value': 1}, "unknown fact 'salary'"),
+    ({'fact': 'tenure_years', 'op': '=~', 'value': 1}, "unknown operator '=~'")
+])
+def test_invalid_rule_raises_policy_error(rule, error):
+    with pytest.raises(PolicyError, match=error):
+        CompiledPolicy({'decisions': {'promotion': [rule]}}, FACT_LOADERS)
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    path = tmp_path / 'policies.json'
+    definition = {'version': 1, 'decisions': {
+        'promotion': [{'fact': 'tenure_years', 'op': '>=', 'value': 1}]
+    }}
+    _write_policy(path, definition, 1000)
+    engine = PolicyEngine(str(path), FACT_LOADERS, reload_interval=0)
+    assert engine.policy.evaluate('promotion', {'tenure_years': 2})[0]
+
+    definition = {'version': 2, 'decisions': {
+        'promotion': [{'fact': 'tenure_years', 'op': '>=', 'value': 3}]
+    }}
+    _write_policy(path, definition, 2000)
+    assert engine.policy.version == 2
+    assert not engine.policy.evaluate('promotion', {'tenure_years': 2})[0]
+
+
+def test_invalid_file_keeps_previous_plan(tmp_path):
+    path = tmp_path / 'policies.json'
+    _write_policy(path, {'version': 1, 'decisions': {}}, 1000)
+    engine = PolicyEngine(str(path), FACT_LOADERS, reload_interval=0)
+    previous = engine.policy
+
+    _write_policy(path, {'version': 2, 'decisions': {
+        'promotion': [{'fact': 'salary', 'op': '>=', 'value': 1}]
+    }}, 2000)
+    assert engine.policy is previous
+
+    path.write_text('{not json', encoding='utf-8')
+    os.utime(path, (3000, 3000))
+    assert engine.policy is previous
+
+
+def test_facts_are_fetched_with_one_query_each(staff):
+    engine = PolicyEngine(Config.POLICY_PATH, FACT_LOADERS)
+    policy = engine.policy
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        facts = engine.fetch_facts('termination', staff[:4], policy)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert len(statements) == len(policy.facts['termination']) == 2
+    assert facts[10] == {'documented_issue_count': 2, 'days_since_last_review': 30}
+
+    # Employee 13 has never been reviewed: the fact is missing and fails its rule
+    assert facts[13] == {'documented_issue_count': 2}
+    assert policy.evaluate('termination', facts[13]) == \
+        (False, "Recent performance review required")
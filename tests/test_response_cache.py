@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import update
+
+from models.models import Employee, db
+from services.response_cache import cached_response, table_versions
+
+
+@pytest.fixture
+def versions():
+    yield table_versions
+    table_versions.configure(None)
+    table_versions.etags_enabled = True
+
+
+def _client(app):
+    @app.route('/items')
+    @cached_response('employees')
+    def items():
+        return [{'id': 1}], 200
+    return app.test_client()
+
+
+def test_single_instance_answers_304_for_current_etag(app, versions):
+    app.config.update(APP_INSTANCES=1, SOCKETIO_MESSAGE_QUEUE=None)
+    versions.init_app(app)
+    client = _client(app)
+
+    etag = client.get('/items').headers['ETag']
+    assert client.get('/items', headers={'If-None-Match': etag}).status_code == 304
+    versions.bump(['employees'])
+    assert client.get('/items', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_etags_off_across_instances_without_shared_versions(app, versions):
+    app.config.update(APP_INSTANCES=4, SOCKETIO_MESSAGE_QUEUE='memory://')
+    versions.init_app(app)
+    client = _client(app)
+
+    response = client.get('/items')
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+    assert response.get_json() == [{'id': 1}]
+
+
+def test_orm_update_statement_bumps_table_version(app, versions):
+    before = versions.get(('employees',))
+    db.session.execute(update(Employee).where(Employee.id == 1).values(department='HR'))
+    db.session.commit()
+    assert versions.get(('employees',)) != before
+
+
+def test_unreachable_redis_serves_without_etags(app, versions):
+    app.config.update(RESPONSE_VERSION_URL='redis://127.0.0.1:1/0', APP_INSTANCES=2)
+    versions.init_app(app)
+    client = _client(app)
+
+    # A committed write must not fail because the version bump cannot reach Redis
+    db.session.get(Employee, 1).department = 'HR'
+    db.session.commit()
+
+    response = client.get('/items')
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
@@ -0,0 +1,39 @@
+import queue
+
+import socketio
+
+from services.socket_broker import InMemoryManager
+
+
+class _Instance:
+    """A Socket.IO server on the shared channel with one connected client"""
+
+    def __init__(self, channel):
+        self.server = socketio.Server(client_manager=InMemoryManager(channel=channel),
+                                      async_mode='threading')
+        self.received = queue.Queue()
+        self.server._send_eio_packet = lambda eio_sid, pkt: self.received.put(
+            socketio.packet.Packet(encoded_packet=pkt.data).data)
+        self.server.manager.initialize()
+        self.server.manager.connect('client-eio-sid', '/')
+
+
+def test_emit_reaches_client_of_other_server():
+    sender = _Instance('test-broadcast')
+    receiver = _Instance('test-broadcast')
+
+    sender.server.emit('access_change', {'employee_id': 1, 'change': 'revoked'})
+
+    expected = ['access_change', {'employee_id': 1, 'change': 'revoked'}]
+    assert receiver.received.get(timeout=2) == expected
+    assert sender.received.get(timeout=2) == expected
+
+
+def test_other_channels_are_not_reached():
+    sender = _Instance('test-sender-only')
+    receiver = _Instance('test-receiver-only')
+
+    sender.server.emit('access_change', {'employee_id': 1})
+
+    assert sender.received.get(timeout=2) == ['access_change', {'employee_id': 1}]
+    assert receiver.received.empty()
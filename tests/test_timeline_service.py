@@ -0,0 +1,94 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from controllers.access_manager import AccessManager
+from models.models import DecisionLog, PerformanceReview, db
+from services.timeline_service import TimelineService
+
+
+def _log(row_id, decision_type):
+    db.session.add(DecisionLog(id=row_id, employee_id=1, decision_type=decision_type,
+                               decision_data={}, automated_decision=True))
+    db.session.commit()
+
+
+def test_row_committed_behind_a_higher_id_is_not_skipped(app):
+    timeline = TimelineService()
+    _log(1, 'grant_building_access')
+    _log(3, 'revoke_building_access')
+    assert [e['id'] for e in timeline.iter_entries(1)] == [3, 1]
+
+    # id 2 was allocated first but its transaction committed last
+    _log(2, 'grant_system_access')
+    timeline.mark_stale([{'employee_id': 1}])
+    assert sorted(e['id'] for e in timeline.iter_entries(1)) == [1, 2, 3]
+
+
+def test_review_appears_once(app):
+    timeline = TimelineService()
+    db.session.add(PerformanceReview(employee_id=1, review_date=datetime.utcnow(), reviewer_id=1,
+                                     metrics={}, overall_score=3.5))
+    _log(1, 'performance_review')
+    entries = timeline.iter_entries(1)
+    assert [(e['kind'], e['type']) for e in entries] == [('review', 'performance_review')]
+
+
+def test_late_row_is_found_after_a_delete(app):
+    timeline = TimelineService()
+    _log(1, 'grant_building_access')
+    _log(3, 'revoke_building_access')
+    assert [e['id'] for e in timeline.iter_entries(1)] == [3, 1]
+
+    # One row gone and one late row in: the row count alone matches the cache again
+    db.session.delete(db.session.get(DecisionLog, 1))
+    db.session.commit()
+    _log(2, 'grant_system_access')
+    timeline.mark_stale([{'employee_id': 1}])
+    assert 2 in [e['id'] for e in timeline.iter_entries(1)]
+
+
+def test_kind_is_filtered_in_the_query(app):
+    timeline = TimelineService()
+    _log(1, 'grant_building_access')
+    _log(2, 'termination')
+    _log(3, 'revoke_building_access')
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, *args):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        entries = timeline.iter_entries(1, kinds={'access'})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert [e['id'] for e in entries] == [3, 1]
+    assert statements and all('decision_category' in statement and 'access' in parameters
+                              for statement, parameters in statements)
+
+
+def test_pages_merge_kinds_newest_first(app):
+    timeline = TimelineService()
+    for row_id, decision_type in enumerate(['grant_building_access', 'termination',
+                                            'revoke_building_access', 'promotion',
+                                            'grant_system_access'], start=1):
+        _log(row_id, decision_type)
+
+    seen, cursor = [], None
+    while True:
+        page = timeline.get_timeline(1, limit=2, cursor=cursor)
+        seen.extend(e['id'] for e in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == [5, 4, 3, 2, 1]
+
+
+def test_access_history_timestamps_are_datetimes(app):
+    _log(1, 'grant_building_access')
+    history = AccessManager().get_access_history(1)
+    assert [entry['decision_type'] for entry in history] == ['grant_building_access']
+    assert isinstance(history[0]['timestamp'], datetime)
@@ -0,0 +1,12 @@
+"""
+Production entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every instance started by deploy/serve.py starts the access scheduler; a
+lock file makes sure only one of them runs it at a time.
+"""
+from app import app, access_scheduler
+
+if app.config['ACCESS_SCHEDULER_ENABLED']:
+    access_scheduler.start()